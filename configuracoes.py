@@ -0,0 +1,54 @@
+# Configurações do terminal de ponto
+import os
+
+# Backend de detecção de rosto: "haar" ou "mediapipe" (BlazeFace).
+# Escolha por terminal com a variável de ambiente RH247_DETECTOR_FACES,
+# usando ferramentas/bench_detectores.py para comparar na CPU do terminal.
+DETECTOR_FACES = os.environ.get("RH247_DETECTOR_FACES", "haar")
+
+# Fonte dos frames da câmera: índice do dispositivo ("0"), pasta de imagens
+# ou arquivo de vídeo (para reproduzir gravações sem webcam).
+FONTE_CAMERA = os.environ.get("RH247_FONTE_CAMERA", "0")
+
+# Detecção de rosto por tela (parâmetros de servicos.deteccao_faces.DetectorRastreado)
+#   escala: fator de redução do frame antes do detector
+#   margem_roi: folga ao redor do último rosto onde ele é procurado no próximo frame
+#   redetectar_a_cada: a cada N frames varre o frame inteiro novamente
+DETECCAO_POR_TELA = {
+    "registro_ponto": {
+        "escala": 0.5,
+        "margem_roi": 0.5,
+        "redetectar_a_cada": 10,
+        "min_size": (100, 100),
+    },
+    "prova_vida": {
+        # Rostos pequenos (30px) não sobrevivem à redução do frame
+        "escala": 1.0,
+        "margem_roi": 0.5,
+        "redetectar_a_cada": 10,
+        "min_size": (30, 30),
+    },
+    "cadastrar_funcionario": {
+        "escala": 0.5,
+        "margem_roi": 0.5,
+        "redetectar_a_cada": 10,
+        "min_size": (100, 100),
+    },
+}
+
+# Batidas já sincronizadas com mais de N dias saem de ponto_final para as
+# tabelas mensais ponto_arquivo_AAAAMM (servicos.arquivo_pontos).
+DIAS_RETENCAO_PONTOS = int(os.environ.get("RH247_DIAS_RETENCAO_PONTOS", "90"))
+
+# Estados, cidades e entidades são baixados novamente só depois de N horas
+# (e com requisição condicional; ver updates_entidades).
+HORAS_VALIDADE_REFERENCIA = int(os.environ.get("RH247_HORAS_VALIDADE_REFERENCIA", "24"))
+
+# Base das APIs de sincronização. Aponte para ferramentas/servidor_stub.py
+# (ex.: http://127.0.0.1:8765) para testar sem o servidor real.
+API_URL_BASE = os.environ.get("RH247_API_URL", "https://api.rh247.com.br/230440023/app/sincronizacao")
+
+# Envio das batidas (servicos.envio_batidas): batidas por requisição e
+# quantas requisições podem estar em andamento ao mesmo tempo.
+TAMANHO_LOTE_BATIDAS = int(os.environ.get("RH247_TAMANHO_LOTE_BATIDAS", "200"))
+ENVIOS_SIMULTANEOS_BATIDAS = int(os.environ.get("RH247_ENVIOS_SIMULTANEOS_BATIDAS", "2"))
@@ -1,4 +1,7 @@
+import base64
+import binascii
 import sqlite3
+from servicos.banco_dados import DB_PATH, obter_conexao
 
 # Define as SQLs para criação das tabelas
 SQLS = {
@@ -13,7 +16,8 @@ SQLS = {
         CREATE TABLE IF NOT EXISTS cidades (
             id INTEGER PRIMARY KEY NOT NULL, 
             codigo_igbe VARCHAR(200) NOT NULL,
-            nome VARCHAR(200) NOT NULL
+            nome VARCHAR(200) NOT NULL,
+            estado_id INTEGER
         );
     """,
 
@@ -45,9 +49,10 @@ SQLS = {
             matricula VARCHAR(100) NOT NULL, 
             entidade_id INTEGER NOT NULL,
             cpf VARCHAR(14) NOT NULL,
-            embedding TEXT NOT NULL,
-            foto_base64 TEXT NOT NULL,
-            foto_blob BLOB NOT NULL
+            embedding BLOB,
+            foto_blob BLOB NOT NULL,
+            ativo INTEGER NOT NULL DEFAULT 1,
+            origem_api INTEGER NOT NULL DEFAULT 0
         );
     """,
 
@@ -60,37 +65,352 @@ SQLS = {
         );
     """,
 
+    "CREATE_TABLE_SINCRONIZACAO_REFERENCIA": """
+        CREATE TABLE IF NOT EXISTS sincronizacao_referencia (
+            tabela VARCHAR(100) PRIMARY KEY NOT NULL,
+            etag VARCHAR(200),
+            last_modified VARCHAR(100),
+            atualizado_em DATETIME NOT NULL
+        );
+    """,
+
+    "CREATE_TABLE_SINCRONIZACAO_FUNCIONARIOS": """
+        CREATE TABLE IF NOT EXISTS sincronizacao_funcionarios (
+            entidade_id INTEGER NOT NULL,
+            recurso VARCHAR(100) NOT NULL,
+            cursor VARCHAR(100) NOT NULL,
+            atualizado_em DATETIME NOT NULL,
+            PRIMARY KEY (entidade_id, recurso)
+        );
+    """,
+
     "CREATE_TABLE_PONTO_FINAL": """
         CREATE TABLE IF NOT EXISTS ponto_final (
             id INTEGER PRIMARY KEY NOT NULL, 
             data_ponto DATETIME NOT NULL, 
             funcionario_vinculo_id INTEGER NOT NULL,
-            sincronizado INTEGER NOT NULL DEFAULT 0 
+            sincronizado INTEGER NOT NULL DEFAULT 0,
+            chave VARCHAR(32)
         );
     """,
 }
 
-def criar_tabelas(db_path):
-    """Verifica e cria as tabelas no banco de dados, se não existirem."""
+# Quantidade de funcionários convertidos por transação nas migrações
+TAMANHO_LOTE_MIGRACAO = 500
+# ALTER TABLE ... DROP COLUMN só existe a partir do SQLite 3.35
+SQLITE_DROP_COLUMN = (3, 35, 0)
+
+
+def _reconstruir_funcionarios_embedding(cursor):
+    """
+    Fim da migração 1 em SQLite sem DROP COLUMN: cria a tabela no formato
+    novo, copia as linhas e troca pela antiga (numa transação). Nessa
+    versão do schema funcionarios ainda não tem índices nem triggers.
+    """
+    cursor.executescript(
+        """
+        BEGIN;
+        CREATE TABLE funcionarios_nova (
+            funcionario_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome VARCHAR(200) NOT NULL,
+            matricula VARCHAR(100) NOT NULL,
+            entidade_id INTEGER NOT NULL,
+            cpf VARCHAR(14) NOT NULL,
+            foto_blob BLOB NOT NULL,
+            embedding BLOB
+        );
+        INSERT INTO funcionarios_nova (funcionario_id, nome, matricula, entidade_id, cpf, foto_blob, embedding)
+        SELECT funcionario_id, nome, matricula, entidade_id, cpf, foto_blob, embedding_bin FROM funcionarios;
+        DROP TABLE funcionarios;
+        ALTER TABLE funcionarios_nova RENAME TO funcionarios;
+        COMMIT;
+        """
+    )
+
+
+def _trocar_colunas_embedding(conn, colunas):
+    """
+    Fim da migração 1: apaga `embedding` (hex) e `foto_base64` e renomeia
+    `embedding_bin` para `embedding` numa única transação. O sqlite3 do
+    Python faria commit de cada ALTER separado, e uma queda no meio deixaria
+    a tabela sem `embedding`.
+    """
+    if sqlite3.sqlite_version_info < SQLITE_DROP_COLUMN:
+        _reconstruir_funcionarios_embedding(conn.cursor())
+        return
+
+    cursor = conn.cursor()
+    cursor.execute("BEGIN")
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        # Bancos interrompidos por versões anteriores podem já ter perdido alguma coluna
+        if "embedding" in colunas:
+            cursor.execute("ALTER TABLE funcionarios DROP COLUMN embedding")
+        if "foto_base64" in colunas:
+            cursor.execute("ALTER TABLE funcionarios DROP COLUMN foto_base64")
+        cursor.execute("ALTER TABLE funcionarios RENAME COLUMN embedding_bin TO embedding")
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
 
-        for table_name, create_table_sql in SQLS.items():
-            # print(f"Verificando/criando tabela: {table_name}...")
-            cursor.execute(create_table_sql)
+def migrar_embedding_binario(conn):
+    """
+    Migração 1: `funcionarios.embedding` passa de hex TEXT para BLOB de 8
+    bytes (NULL = hash pendente) e a cópia redundante `foto_base64` é
+    removida. O preenchimento é feito em lotes, com commit a cada lote, e
+    pode ser retomado se interrompido; a troca das colunas no fim é atômica.
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(funcionarios)")
+    colunas = [info[1] for info in cursor.fetchall()]
+    if "embedding_bin" not in colunas and "foto_base64" not in colunas:
+        return  # Banco criado (ou já migrado) no formato novo
 
+    if "embedding" not in colunas:
+        # O preenchimento terminou e a troca foi interrompida depois de apagar `embedding`
+        _trocar_colunas_embedding(conn, colunas)
+        return
+
+    if "embedding_bin" not in colunas:
+        cursor.execute("ALTER TABLE funcionarios ADD COLUMN embedding_bin BLOB")
         conn.commit()
-        # print("Tabelas verificadas/criadas com sucesso!")
 
-    # except sqlite3.Error as e:
-        # print(f"Erro ao criar tabelas: {e}")
+    ultimo_id = -1
+    while True:
+        cursor.execute(
+            """
+            SELECT funcionario_id, embedding, foto_base64, length(foto_blob)
+            FROM funcionarios
+            WHERE funcionario_id > ? AND embedding_bin IS NULL
+            ORDER BY funcionario_id
+            LIMIT ?
+            """,
+            (ultimo_id, TAMANHO_LOTE_MIGRACAO),
+        )
+        lote = cursor.fetchall()
+        if not lote:
+            break
+
+        hashes = []
+        fotos = []
+        for funcionario_id, embedding_hex, foto_base64, tamanho_blob in lote:
+            try:
+                embedding = bytes.fromhex(embedding_hex or "")
+            except ValueError:
+                embedding = b""
+            if len(embedding) == 8:
+                hashes.append((embedding, funcionario_id))
+
+            # Preserva a foto que só existia em base64
+            if not tamanho_blob and foto_base64:
+                try:
+                    fotos.append((base64.b64decode(foto_base64), funcionario_id))
+                except (binascii.Error, ValueError):
+                    pass
+
+        cursor.executemany("UPDATE funcionarios SET embedding_bin = ? WHERE funcionario_id = ?", hashes)
+        cursor.executemany("UPDATE funcionarios SET foto_blob = ? WHERE funcionario_id = ?", fotos)
+        conn.commit()
+        ultimo_id = lote[-1][0]
+
+    _trocar_colunas_embedding(conn, colunas + ["embedding_bin"])
+
+
+def criar_indices_consultas(conn):
+    """
+    Migração 2: índices para os caminhos de acesso usados pelas telas
+    (batidas pendentes por data, busca de funcionários por CPF/matrícula/
+    entidade e vínculos por funcionário). Também garante a coluna
+    `entidades.entidade_id` em bancos criados por versões antigas.
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(entidades)")
+    colunas = [info[1] for info in cursor.fetchall()]
+    if "entidade_id" not in colunas:
+        cursor.execute("ALTER TABLE entidades ADD COLUMN entidade_id INTEGER NOT NULL DEFAULT 0")
+
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ponto_final_sincronizado_data ON ponto_final (sincronizado, data_ponto)"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_funcionarios_cpf ON funcionarios (cpf)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_funcionarios_matricula ON funcionarios (matricula)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_funcionarios_entidade ON funcionarios (entidade_id)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_funcionarios_vinculos_funcionario ON funcionarios_vinculos (funcionario_id)"
+    )
+    conn.commit()
+
+
+def adicionar_estado_cidades(conn):
+    """
+    Migração 3: `cidades.estado_id` (preenchido na próxima sincronização
+    de municípios) e índice para listar os municípios de um estado já
+    ordenados por nome.
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(cidades)")
+    colunas = [info[1] for info in cursor.fetchall()]
+    if "estado_id" not in colunas:
+        cursor.execute("ALTER TABLE cidades ADD COLUMN estado_id INTEGER")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cidades_estado_nome ON cidades (estado_id, nome)")
+    conn.commit()
+
+
+def criar_indice_busca_funcionarios(conn):
+    """
+    Migração 4: índice FTS5 (external content) sobre funcionarios.nome,
+    sem acentos e sem diferença de maiúsculas, com índices de prefixo
+    para a busca enquanto o usuário digita. Triggers mantêm o índice em
+    sincronia com a tabela. Se o SQLite não tiver FTS5, a busca cai no
+    LIKE (ver servicos.busca_funcionarios).
+    """
+    cursor = conn.cursor()
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_funcionarios_nome ON funcionarios (nome)")
+    try:
+        cursor.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS funcionarios_busca USING fts5(
+                nome,
+                content='funcionarios',
+                content_rowid='funcionario_id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='1 2 3'
+            )
+            """
+        )
+    except sqlite3.OperationalError as e:
+        print(f"[AVISO] FTS5 indisponível, busca por nome usará LIKE: {e}")
+        conn.commit()
+        return
+
+    cursor.executescript(
+        """
+        CREATE TRIGGER IF NOT EXISTS funcionarios_busca_ai AFTER INSERT ON funcionarios BEGIN
+            INSERT INTO funcionarios_busca (rowid, nome) VALUES (new.funcionario_id, new.nome);
+        END;
+        CREATE TRIGGER IF NOT EXISTS funcionarios_busca_ad AFTER DELETE ON funcionarios BEGIN
+            INSERT INTO funcionarios_busca (funcionarios_busca, rowid, nome)
+            VALUES ('delete', old.funcionario_id, old.nome);
+        END;
+        CREATE TRIGGER IF NOT EXISTS funcionarios_busca_au AFTER UPDATE OF nome ON funcionarios BEGIN
+            INSERT INTO funcionarios_busca (funcionarios_busca, rowid, nome)
+            VALUES ('delete', old.funcionario_id, old.nome);
+            INSERT INTO funcionarios_busca (rowid, nome) VALUES (new.funcionario_id, new.nome);
+        END;
+        """
+    )
+    # Indexa os funcionários já existentes
+    cursor.execute("INSERT INTO funcionarios_busca (funcionarios_busca) VALUES ('rebuild')")
+    conn.commit()
+
+
+def adicionar_chave_ponto(conn):
+    """
+    Migração 5: `ponto_final.chave`, identificador único de cada batida
+    gerado no terminal. Torna idempotente a reaplicação do journal do
+    GravadorPontos (INSERT OR IGNORE) e o reenvio à API.
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(ponto_final)")
+    colunas = [info[1] for info in cursor.fetchall()]
+    if "chave" not in colunas:
+        cursor.execute("ALTER TABLE ponto_final ADD COLUMN chave VARCHAR(32)")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_ponto_final_chave ON ponto_final (chave)")
+    conn.commit()
+
+
+def criar_sincronizacao_referencia(conn):
+    """
+    Migração 6: tabela com ETag/Last-Modified e horário da última
+    atualização de estados, cidades e entidades, usada para só baixar
+    os dados de referência quando estiverem vencidos e com requisições
+    condicionais.
+    """
+    conn.execute(SQLS["CREATE_TABLE_SINCRONIZACAO_REFERENCIA"])
+    conn.commit()
+
+
+def adicionar_sincronizacao_funcionarios(conn):
+    """
+    Migração 7: `funcionarios.ativo` (funcionários removidos na API são
+    desativados, não apagados, para manter as batidas deles) e a tabela
+    com o cursor da sincronização incremental de cada entidade.
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(funcionarios)")
+    colunas = [info[1] for info in cursor.fetchall()]
+    if "ativo" not in colunas:
+        cursor.execute("ALTER TABLE funcionarios ADD COLUMN ativo INTEGER NOT NULL DEFAULT 1")
+    cursor.execute(SQLS["CREATE_TABLE_SINCRONIZACAO_FUNCIONARIOS"])
+    conn.commit()
+
+
+def adicionar_origem_funcionarios(conn):
+    """
+    Migração 8: `funcionarios.origem_api` separa os funcionários vindos da
+    API (1) dos cadastrados no terminal (0). A sincronização só atualiza e
+    desativa os da API. Nos bancos existentes, conta como vindo da API quem
+    tem vínculo em funcionarios_vinculos (a tela de cadastro não cria vínculo).
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(funcionarios)")
+    colunas = [info[1] for info in cursor.fetchall()]
+    if "origem_api" not in colunas:
+        cursor.execute("ALTER TABLE funcionarios ADD COLUMN origem_api INTEGER NOT NULL DEFAULT 0")
+        cursor.execute(
+            """
+            UPDATE funcionarios SET origem_api = 1
+            WHERE funcionario_id IN (SELECT funcionario_id FROM funcionarios_vinculos)
+            """
+        )
+    conn.commit()
+
+
+# Migrações versionadas (PRAGMA user_version), aplicadas em ordem
+MIGRACOES = {
+    1: migrar_embedding_binario,
+    2: criar_indices_consultas,
+    3: adicionar_estado_cidades,
+    4: criar_indice_busca_funcionarios,
+    5: adicionar_chave_ponto,
+    6: criar_sincronizacao_referencia,
+    7: adicionar_sincronizacao_funcionarios,
+    8: adicionar_origem_funcionarios,
+}
+VERSAO_ATUAL = max(MIGRACOES)
+
+
+def aplicar_migracoes(conn):
+    """Aplica as migrações pendentes e atualiza o user_version a cada uma."""
+    versao_atual = conn.execute("PRAGMA user_version").fetchone()[0]
+    for versao in sorted(MIGRACOES):
+        if versao <= versao_atual:
+            continue
+        MIGRACOES[versao](conn)
+        conn.execute(f"PRAGMA user_version = {versao}")
+        conn.commit()
+
+
+def criar_tabelas(db_path):
+    """
+    Cria as tabelas e aplica as migrações pendentes. Deve ser chamada uma
+    vez na inicialização; com o schema já na VERSAO_ATUAL nenhum DDL é executado.
+    """
+    conn = obter_conexao(db_path)
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= VERSAO_ATUAL:
+        return
+
+    cursor = conn.cursor()
+
+    for table_name, create_table_sql in SQLS.items():
+        # print(f"Verificando/criando tabela: {table_name}...")
+        cursor.execute(create_table_sql)
 
-    finally:
-        if conn:
-            conn.close()
+    conn.commit()
+    aplicar_migracoes(conn)
+    # print("Tabelas verificadas/criadas com sucesso!")
 
 # Exemplo de uso
 if __name__ == "__main__":
-    db_path = "banco_de_dados.db"  # Substitua pelo caminho do seu banco de dados
-    criar_tabelas(db_path)
+    criar_tabelas(DB_PATH)
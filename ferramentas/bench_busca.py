@@ -0,0 +1,78 @@
+"""
+Benchmark da busca de funcionários (tela de sincronização): FTS5 com
+prefixos sem acento x LIKE '%texto%', numa base sintética.
+
+Uso (a partir da raiz do projeto):
+    python -m ferramentas.bench_busca
+    python -m ferramentas.bench_busca --funcionarios 100000 "jo" "joao sil" "conceicao"
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from criar_tabelas import criar_tabelas
+from servicos.banco_dados import consultar, transacao
+from servicos.busca_funcionarios import buscar_funcionarios
+
+NOMES = ["João", "Maria", "José", "Antônio", "Francisco", "Ana", "Luíz", "Paulo", "Márcia", "Conceição", "Sebastião"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Lima", "Araújo", "Gonçalves", "Magalhães", "Brandão", "Estêvão"]
+CONSULTAS_PADRAO = ["j", "jo", "joao", "joao silva", "conceicao bran", "sebastiao estevao 9"]
+
+
+def popular(db_path, quantidade, seed):
+    criar_tabelas(db_path)
+    rng = random.Random(seed)
+    with transacao(db_path) as conn:
+        conn.executemany(
+            """
+            INSERT INTO funcionarios (nome, matricula, entidade_id, cpf, embedding, foto_blob)
+            VALUES (?, ?, 0, ?, NULL, x'')
+            """,
+            (
+                (f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)} {i}", str(i), f"{i:011d}")
+                for i in range(quantidade)
+            ),
+        )
+
+
+def medir(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1e3, len(resultado)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("consultas", nargs="*", default=CONSULTAS_PADRAO)
+    parser.add_argument("--funcionarios", type=int, default=100000)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta_temporaria:
+        db_path = os.path.join(pasta_temporaria, "bench.db")
+        popular(db_path, args.funcionarios, args.seed)
+
+        print(f"{args.funcionarios} funcionários")
+        print(f"{'consulta':<22} {'FTS5 ms':>8} {'itens':>6} {'LIKE ms':>8} {'itens':>6}")
+        for texto in args.consultas:
+            ms_fts, itens_fts = medir(lambda: buscar_funcionarios("nome", texto, db_path=db_path)[0], args.repeticoes)
+            ms_like, itens_like = medir(
+                lambda: consultar(
+                    "SELECT nome, matricula, cpf FROM funcionarios WHERE nome LIKE ? LIMIT 50",
+                    (f"%{texto}%",),
+                    db_path=db_path,
+                ),
+                args.repeticoes,
+            )
+            print(f"{texto!r:<22} {ms_fts:>8.2f} {itens_fts:>6} {ms_like:>8.2f} {itens_like:>6}")
+
+        ms_cpf, _ = medir(lambda: buscar_funcionarios("cpf", "000.000.012-34", db_path=db_path), args.repeticoes)
+        ms_matricula, _ = medir(lambda: buscar_funcionarios("matricula", "77", db_path=db_path), args.repeticoes)
+        print(f"\ncpf: {ms_cpf:.3f} ms, matrícula: {ms_matricula:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark de tempo de CPU da detecção de rosto: varredura completa em
+resolução cheia x frame reduzido x rastreamento por ROI.
+
+Uso (a partir da raiz do projeto):
+    python -m ferramentas.bench_deteccao gravacoes/fila_manha.mp4
+    python -m ferramentas.bench_deteccao pasta_de_frames/ --escala 0.5 --redetectar-a-cada 10
+"""
+import argparse
+import time
+from servicos.deteccao_faces import DetectorRastreado, criar_backend, BACKENDS
+from servicos.fontes_camera import criar_fonte
+
+
+def carregar_frames(caminho, limite=None):
+    """Lê os frames de um vídeo ou de uma pasta de imagens (ordem alfabética)."""
+    fonte = criar_fonte(caminho, tempo_real=False, repetir=False)
+    frames = []
+    while not limite or len(frames) < limite:
+        ret, frame = fonte.read()
+        if not ret:
+            break
+        frames.append(frame)
+    fonte.release()
+    return frames
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    largura = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    altura = max(0, min(ay + ah, by + bh) - max(ay, by))
+    intersecao = largura * altura
+    uniao = aw * ah + bw * bh - intersecao
+    return intersecao / uniao if uniao else 0.0
+
+
+def medir(detector, frames):
+    inicio_cpu = time.process_time()
+    inicio = time.perf_counter()
+    resultados = [detector.detectar(frame) for frame in frames]
+    cpu = time.process_time() - inicio_cpu
+    parede = time.perf_counter() - inicio
+    return cpu, parede, resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entrada", help="vídeo ou pasta de imagens gravadas no terminal")
+    parser.add_argument("--limite", type=int, default=None, help="máximo de frames")
+    parser.add_argument("--escala", type=float, default=0.5)
+    parser.add_argument("--margem-roi", type=float, default=0.5)
+    parser.add_argument("--redetectar-a-cada", type=int, default=10)
+    parser.add_argument("--min-size", type=int, default=100)
+    parser.add_argument("--backend", choices=list(BACKENDS), default="haar")
+    args = parser.parse_args()
+
+    frames = carregar_frames(args.entrada, args.limite)
+    if not frames:
+        raise SystemExit(f"Nenhum frame lido de {args.entrada}")
+
+    min_size = (args.min_size, args.min_size)
+    modos = {
+        "completo": DetectorRastreado(criar_backend(args.backend), escala=1.0, redetectar_a_cada=1, min_size=min_size),
+        "reduzido": DetectorRastreado(
+            criar_backend(args.backend), escala=args.escala, redetectar_a_cada=1, min_size=min_size
+        ),
+        "rastreado": DetectorRastreado(
+            criar_backend(args.backend),
+            escala=args.escala,
+            margem_roi=args.margem_roi,
+            redetectar_a_cada=args.redetectar_a_cada,
+            min_size=min_size,
+        ),
+    }
+
+    print(f"{len(frames)} frames de {frames[0].shape[1]}x{frames[0].shape[0]}")
+    print(f"{'modo':<10} {'CPU ms/frame':>13} {'ms/frame':>9} {'com rosto':>10} {'concorda':>9}")
+
+    referencia = None
+    for nome, detector in modos.items():
+        cpu, parede, resultados = medir(detector, frames)
+        com_rosto = sum(1 for r in resultados if r) / len(frames)
+        if referencia is None:
+            referencia = resultados
+        # Frames em que o primeiro rosto coincide (IoU >= 0.5) com a varredura completa
+        concordancia = sum(
+            1 for ref, r in zip(referencia, resultados)
+            if (not ref and not r) or (ref and r and iou(ref[0], r[0]) >= 0.5)
+        ) / len(frames)
+        print(
+            f"{nome:<10} {cpu / len(frames) * 1e3:>13.2f} {parede / len(frames) * 1e3:>9.2f} "
+            f"{com_rosto * 100:>9.1f}% {concordancia * 100:>8.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
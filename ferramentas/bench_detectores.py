@@ -0,0 +1,63 @@
+"""
+Compara os backends de detecção de rosto (Haar x MediaPipe BlazeFace)
+sobre uma pasta de frames gravados (ou vídeo), na CPU do terminal.
+Reporta frames/s, detecções/s e taxa de acerto (frames com rosto).
+
+Uso (a partir da raiz do projeto):
+    python -m ferramentas.bench_detectores pasta_de_frames/
+    python -m ferramentas.bench_detectores pasta_de_frames/ --backends haar mediapipe --rastreado
+"""
+import argparse
+import time
+from configuracoes import DETECCAO_POR_TELA
+from servicos.deteccao_faces import BACKENDS, DetectorRastreado, criar_backend
+from ferramentas.bench_deteccao import carregar_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entrada", help="pasta de imagens ou vídeo gravado no terminal")
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--limite", type=int, default=None, help="máximo de frames")
+    parser.add_argument(
+        "--rastreado",
+        action="store_true",
+        help="usa o rastreamento por ROI com os parâmetros da tela registro_ponto",
+    )
+    args = parser.parse_args()
+
+    frames = carregar_frames(args.entrada, args.limite)
+    if not frames:
+        raise SystemExit(f"Nenhum frame lido de {args.entrada}")
+
+    print(f"{len(frames)} frames de {frames[0].shape[1]}x{frames[0].shape[0]}")
+    print(f"{'backend':<10} {'carga (ms)':>10} {'frames/s':>9} {'detecções/s':>12} {'acerto':>8}")
+
+    for nome in args.backends:
+        inicio = time.perf_counter()
+        try:
+            backend = criar_backend(nome)
+        except ImportError as e:
+            print(f"{nome:<10} indisponível: {e}")
+            continue
+        carga = time.perf_counter() - inicio
+
+        if args.rastreado:
+            detector = DetectorRastreado(backend, **DETECCAO_POR_TELA["registro_ponto"])
+        else:
+            detector = DetectorRastreado(backend, escala=1.0, redetectar_a_cada=1, min_size=(0, 0))
+
+        inicio = time.perf_counter()
+        resultados = [detector.detectar(frame) for frame in frames]
+        duracao = time.perf_counter() - inicio
+
+        deteccoes = sum(len(r) for r in resultados)
+        acerto = sum(1 for r in resultados if r) / len(frames)
+        print(
+            f"{nome:<10} {carga * 1e3:>10.1f} {len(frames) / duracao:>9.1f} "
+            f"{deteccoes / duracao:>12.1f} {acerto * 100:>7.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
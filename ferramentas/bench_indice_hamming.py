@@ -0,0 +1,76 @@
+"""
+Benchmark: busca por raio no índice multi-hash x varredura linear.
+
+Uso (a partir da raiz do projeto):
+    python -m ferramentas.bench_indice_hamming
+    python -m ferramentas.bench_indice_hamming --tamanhos 1000 10000 100000 --raio 15
+"""
+import argparse
+import time
+import numpy as np
+from servicos.galeria_hashes import GaleriaHashes
+from servicos.indice_hamming import IndiceMultiHash
+
+
+def gerar_consultas(rng, hashes, quantidade, max_bits_alterados):
+    """Metade das consultas são hashes da galeria com ruído, metade são aleatórias (impostores)."""
+    metade = quantidade // 2
+    origem = hashes[rng.integers(0, len(hashes), metade)].copy()
+    bits = np.unpackbits(origem, axis=1)
+    for linha in bits:
+        alterados = rng.choice(64, rng.integers(0, max_bits_alterados + 1), replace=False)
+        linha[alterados] ^= 1
+    genuinas = np.packbits(bits, axis=1)
+    impostoras = rng.integers(0, 256, (quantidade - metade, 8), dtype=np.uint8)
+    return np.concatenate([genuinas, impostoras])
+
+
+def busca_linear(galeria, consulta, raio):
+    diffs = galeria.distancias(consulta)
+    posicoes = np.flatnonzero(diffs <= raio)
+    return posicoes, diffs[posicoes]
+
+
+def medir(funcao, consultas):
+    inicio = time.perf_counter()
+    resultados = [funcao(c) for c in consultas]
+    return (time.perf_counter() - inicio) / len(consultas), resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--raio", type=int, default=15)
+    parser.add_argument("--consultas", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'N':>8} {'método':<14} {'constr. (ms)':>12} {'µs/consulta':>12} {'candidatos':>11}")
+
+    for tamanho in args.tamanhos:
+        hashes = rng.integers(0, 256, (tamanho, 8), dtype=np.uint8)
+        consultas = gerar_consultas(rng, hashes, args.consultas, args.raio)
+        galeria = GaleriaHashes(np.arange(tamanho), hashes, min_funcionarios_indice=tamanho + 1)
+
+        t_linear, esperado = medir(lambda c: busca_linear(galeria, c, args.raio), consultas)
+        print(f"{tamanho:>8} {'linear':<14} {0:>12.1f} {t_linear * 1e6:>12.1f} {100.0:>10.1f}%")
+
+        for bits in (8, 16):
+            inicio = time.perf_counter()
+            indice = IndiceMultiHash(hashes, bits_substring=bits)
+            t_construcao = time.perf_counter() - inicio
+
+            t_indice, obtido = medir(lambda c: indice.buscar_raio(c, args.raio), consultas)
+            for (pos_esp, _), (pos_obt, _) in zip(esperado, obtido):
+                assert set(pos_esp.tolist()) == set(pos_obt.tolist()), "índice divergiu da busca linear"
+
+            fracao = np.mean([len(indice.candidatos(c, args.raio)) for c in consultas]) / tamanho
+            print(
+                f"{tamanho:>8} {f'MIH {bits} bits':<14} {t_construcao * 1e3:>12.1f} "
+                f"{t_indice * 1e6:>12.1f} {fracao * 100:>10.1f}%"
+            )
+
+
+if __name__ == "__main__":
+    main()
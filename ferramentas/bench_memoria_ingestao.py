@@ -0,0 +1,94 @@
+"""
+Benchmark de memória da importação de funcionários: response.json()
+com a lista inteira x ingestão em fluxo (servicos.json_streaming), medindo
+o pico de memória Python com tracemalloc. O servidor stub roda num
+processo separado, para a memória dele não entrar na medição.
+
+Uso (a partir da raiz do projeto):
+    python -m ferramentas.bench_memoria_ingestao
+    python -m ferramentas.bench_memoria_ingestao --funcionarios 5000 --tamanho-foto 60000
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import httpx
+from criar_tabelas import criar_tabelas
+from servicos.banco_dados import consultar_um
+from servicos.cliente_api import ClienteAPI
+from servicos.sincronizacao_funcionarios import aplicar_vinculos, gravar_lote_funcionarios, sincronizar_funcionarios
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def aguardar_servidor(url_base, tempo_maximo=120.0):
+    limite = time.monotonic() + tempo_maximo
+    while time.monotonic() < limite:
+        try:
+            httpx.get(f"{url_base}/estados", timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError("Servidor stub não respondeu.")
+
+
+def importar_lista_inteira(cliente, db_path):
+    """Caminho antigo: a resposta inteira decodificada de uma vez."""
+    vinculos = cliente.buscar("funcionarios-vinculos", {"entidade_id": 1}).json()
+    aplicar_vinculos(db_path, 1, vinculos, delta=False)
+    matriculas = {v["funcionario_id"]: v["matricula"] for v in vinculos["data"]}
+    response = cliente.buscar("funcionarios", {"entidade_id": 1})
+    gravar_lote_funcionarios(db_path, 1, response.json()["data"], matriculas, set())
+
+
+def medir(nome, funcao, cliente, pasta):
+    db_path = os.path.join(pasta, f"{nome}.db")
+    criar_tabelas(db_path)
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    inicio = time.perf_counter()
+    funcao(cliente, db_path)
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    gravados = consultar_um("SELECT COUNT(*) FROM funcionarios", db_path=db_path)[0]
+    print(f"{nome:<14} {(pico - base) / 2**20:10.1f} {duracao:8.2f} {gravados:10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--funcionarios", type=int, default=2000)
+    parser.add_argument("--tamanho-foto", type=int, default=40000, help="bytes de cada foto")
+    args = parser.parse_args()
+
+    porta = porta_livre()
+    servidor = subprocess.Popen([
+        sys.executable, "-m", "ferramentas.servidor_stub", "--porta", str(porta),
+        "--funcionarios", str(args.funcionarios), "--tamanho-foto", str(args.tamanho_foto),
+    ], stdout=subprocess.DEVNULL)
+    url_base = f"http://127.0.0.1:{porta}"
+    cliente = ClienteAPI(url_base)
+    try:
+        aguardar_servidor(url_base)
+        tracemalloc.start()
+        with tempfile.TemporaryDirectory() as pasta:
+            print(f"{args.funcionarios} funcionários, fotos de {args.tamanho_foto} bytes")
+            print(f"{'modo':<14} {'pico MiB':>10} {'s':>8} {'gravados':>10}")
+            medir("lista inteira", importar_lista_inteira, cliente, pasta)
+            medir("em fluxo", lambda c, db: sincronizar_funcionarios(1, db, completo=True, cliente=c), cliente, pasta)
+        tracemalloc.stop()
+    finally:
+        cliente.encerrar()
+        servidor.terminate()
+        servidor.wait()
+
+
+if __name__ == "__main__":
+    main()
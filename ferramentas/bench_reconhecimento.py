@@ -0,0 +1,198 @@
+"""
+Replay offline do reconhecimento facial do registro de ponto, sem webcam.
+
+Cada item da pasta de gravações (vídeo ou pasta de frames) é uma
+passagem de uma pessoa pelo totem. O rótulo da pessoa é o nome do item
+até o primeiro "_" (ex.: maria_01.mp4, joao_manha/). A pasta de cadastros
+tem uma foto por funcionário cadastrado (<rotulo>.jpg); rótulos sem foto
+de cadastro são impostores e devem ser rejeitados.
+
+O benchmark monta uma galeria sintética de `--galeria` funcionários com
+hashes aleatórios mais os cadastrados, reproduz cada gravação pelos mesmos
+estágios da tela (detecção, hash, match, encode do preview e votação) e
+reporta latência por estágio, fps, tempo até identificar e falsos
+aceites/rejeições.
+
+Uso (a partir da raiz do projeto):
+    python -m ferramentas.bench_reconhecimento gravacoes/ --cadastros cadastros/
+    python -m ferramentas.bench_reconhecimento gravacoes/ --cadastros cadastros/ --galeria 100000
+"""
+import argparse
+import base64
+import os
+import tempfile
+import time
+import cv2
+import numpy as np
+from criar_tabelas import criar_tabelas
+from servicos.banco_dados import transacao
+from servicos.deteccao_faces import criar_detector_tela
+from servicos.fontes_camera import criar_fonte, EXTENSOES_IMAGEM
+from servicos.galeria_hashes import GaleriaHashes
+from servicos.hash_facial import gerar_phash, gerar_hash_facial
+from servicos.votacao_temporal import AcumuladorVotos, ACEITO, ABORTADO
+
+ESTAGIOS = ("deteccao", "hash", "match", "encode")
+
+
+def rotulo_do_item(nome):
+    return os.path.splitext(nome)[0].split("_")[0]
+
+
+def montar_galeria(db_path, pasta_cadastros, tamanho_sintetico, seed):
+    """Grava funcionários sintéticos e cadastrados no banco. Retorna {funcionario_id: rotulo}."""
+    criar_tabelas(db_path)
+    rng = np.random.default_rng(seed)
+    rotulos = {}
+
+    with transacao(db_path) as conn:
+        sinteticos = rng.integers(0, 256, (tamanho_sintetico, 8), dtype=np.uint8)
+        conn.executemany(
+            """
+            INSERT INTO funcionarios (nome, matricula, entidade_id, cpf, embedding, foto_blob)
+            VALUES (?, ?, 0, '00000000000', ?, x'')
+            """,
+            ((f"sintetico_{i}", str(i), h.tobytes()) for i, h in enumerate(sinteticos)),
+        )
+
+        detector = criar_detector_tela("cadastrar_funcionario")
+        for nome in sorted(os.listdir(pasta_cadastros)):
+            if not nome.lower().endswith(EXTENSOES_IMAGEM):
+                continue
+            imagem = cv2.imread(os.path.join(pasta_cadastros, nome))
+            if imagem is None:
+                continue
+            detector.reiniciar()
+            rostos = detector.detectar(imagem)
+            if rostos:
+                x, y, w, h = rostos[0]
+                imagem = imagem[y:y+h, x:x+w]
+            else:
+                print(f"[AVISO] Nenhum rosto em {nome}; usando a imagem inteira.")
+            rotulo = rotulo_do_item(nome)
+            cursor = conn.execute(
+                """
+                INSERT INTO funcionarios (nome, matricula, entidade_id, cpf, embedding, foto_blob)
+                VALUES (?, ?, 0, '00000000000', ?, x'')
+                """,
+                (rotulo, rotulo, gerar_hash_facial(imagem)),
+            )
+            rotulos[cursor.lastrowid] = rotulo
+    return rotulos
+
+
+def reproduzir(caminho, galeria, limiar, duracao):
+    """
+    Reproduz uma gravação pelos estágios do reconhecimento.
+    Retorna (funcionario_id aceito ou None, tempo até identificar em s de
+    gravação, latências por estágio, frames processados, segundos de CPU).
+    """
+    fonte = criar_fonte(caminho, tempo_real=False, repetir=False)
+    fps = getattr(fonte, "fps", 15.0)
+    detector = criar_detector_tela("registro_ponto")
+    votacao = AcumuladorVotos(limiar=limiar)
+    latencias = {estagio: [] for estagio in ESTAGIOS}
+
+    aceito, tempo_identificacao, frames = None, None, 0
+    inicio = time.perf_counter()
+    while frames / fps < duracao:
+        ret, frame = fonte.read()
+        if not ret:
+            break
+        frames += 1
+
+        t0 = time.perf_counter()
+        rostos = detector.detectar(frame)
+        t1 = time.perf_counter()
+        latencias["deteccao"].append(t1 - t0)
+
+        resultado = None
+        if rostos:
+            x, y, w, h = rostos[0]
+            hash_atual = gerar_phash(frame[y:y+h, x:x+w])
+            t2 = time.perf_counter()
+            resultado = galeria.comparar(hash_atual, raio=votacao.raio_busca)
+            t3 = time.perf_counter()
+            latencias["hash"].append(t2 - t1)
+            latencias["match"].append(t3 - t2)
+
+        t4 = time.perf_counter()
+        _, buffer = cv2.imencode(".jpg", frame)
+        base64.b64encode(buffer)
+        latencias["encode"].append(time.perf_counter() - t4)
+
+        decisao = votacao.adicionar(resultado, agora=frames / fps)
+        if decisao is not None and decisao[0] == ACEITO:
+            aceito, tempo_identificacao = decisao[1], frames / fps
+            break
+        if decisao is not None and decisao[0] == ABORTADO:
+            break
+
+    fonte.release()
+    return aceito, tempo_identificacao, latencias, frames, time.perf_counter() - inicio
+
+
+def formatar_ms(valores):
+    if not valores:
+        return f"{'-':>9} {'-':>9}"
+    return f"{np.mean(valores) * 1e3:>9.2f} {np.percentile(valores, 95) * 1e3:>9.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("gravacoes", help="pasta com vídeos ou pastas de frames, uma por passagem")
+    parser.add_argument("--cadastros", required=True, help="pasta com uma foto por funcionário (<rotulo>.jpg)")
+    parser.add_argument("--galeria", type=int, default=10000, help="funcionários sintéticos na galeria")
+    parser.add_argument("--limiar", type=int, default=15, help="PHASH_THRESHOLD")
+    parser.add_argument("--duracao", type=float, default=5.0, help="janela de captura em segundos")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta_temporaria:
+        db_path = os.path.join(pasta_temporaria, "bench.db")
+        rotulos = montar_galeria(db_path, args.cadastros, args.galeria, args.seed)
+        galeria = GaleriaHashes.carregar(db_path)
+    cadastrados = set(rotulos.values())
+    print(f"Galeria: {len(galeria)} funcionários ({len(cadastrados)} cadastrados de verdade)")
+
+    latencias = {estagio: [] for estagio in ESTAGIOS}
+    tempos_identificacao = []
+    total_frames, total_segundos = 0, 0.0
+    contagem = {"aceite correto": 0, "falso aceite": 0, "falsa rejeição": 0, "rejeição correta": 0}
+
+    for nome in sorted(os.listdir(args.gravacoes)):
+        rotulo = rotulo_do_item(nome)
+        aceito, tempo, lat, frames, segundos = reproduzir(
+            os.path.join(args.gravacoes, nome), galeria, args.limiar, args.duracao
+        )
+        for estagio in ESTAGIOS:
+            latencias[estagio].extend(lat[estagio])
+        total_frames += frames
+        total_segundos += segundos
+
+        if aceito is not None:
+            tempos_identificacao.append(tempo)
+            resultado = "aceite correto" if rotulos.get(aceito) == rotulo else "falso aceite"
+        else:
+            resultado = "falsa rejeição" if rotulo in cadastrados else "rejeição correta"
+        contagem[resultado] += 1
+        identificado = rotulos.get(aceito, aceito)
+        print(f"  {nome:<30} -> {resultado:<16} (identificado: {identificado}, {frames} frames)")
+
+    print()
+    print(f"{'estágio':<10} {'média ms':>9} {'p95 ms':>9}")
+    for estagio in ESTAGIOS:
+        print(f"{estagio:<10} {formatar_ms(latencias[estagio])}")
+    if total_segundos:
+        print(f"\nfps de processamento: {total_frames / total_segundos:.1f}")
+    if tempos_identificacao:
+        print(
+            f"tempo até identificar: mediana {np.median(tempos_identificacao):.2f} s, "
+            f"p95 {np.percentile(tempos_identificacao, 95):.2f} s"
+        )
+    for resultado, quantidade in contagem.items():
+        print(f"{resultado}: {quantidade}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark do download das APIs de sincronização contra o servidor stub
+local: requisições uma a uma x em paralelo (ClienteAPI.buscar_varios),
+com o mesmo pool de conexões.
+
+Uso (a partir da raiz do projeto):
+    python -m ferramentas.bench_sincronizacao
+    python -m ferramentas.bench_sincronizacao --atraso 0.5 --funcionarios 5000
+"""
+import argparse
+import time
+from ferramentas.servidor_stub import gerar_dados, iniciar_em_segundo_plano
+from servicos.cliente_api import ClienteAPI
+
+ENDPOINTS = ["estados", "municipios", "entidades", "funcionarios-vinculos", "funcionarios"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--atraso", type=float, default=0.3)
+    parser.add_argument("--funcionarios", type=int, default=2000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    servidor, url_base = iniciar_em_segundo_plano(atraso=args.atraso, dados=gerar_dados(funcionarios=args.funcionarios))
+    cliente = ClienteAPI(url_base)
+    try:
+        cliente.buscar("estados")  # abre a conexão fora da medição
+
+        inicio = time.perf_counter()
+        for _ in range(args.repeticoes):
+            for endpoint in ENDPOINTS:
+                cliente.buscar(endpoint).raise_for_status()
+        sequencial = (time.perf_counter() - inicio) / args.repeticoes
+
+        inicio = time.perf_counter()
+        for _ in range(args.repeticoes):
+            respostas = cliente.buscar_varios({e: (e, None, None) for e in ENDPOINTS})
+            for resposta in respostas.values():
+                resposta.raise_for_status()
+        paralelo = (time.perf_counter() - inicio) / args.repeticoes
+    finally:
+        cliente.encerrar()
+        servidor.shutdown()
+
+    print(f"{len(ENDPOINTS)} endpoints, atraso de {args.atraso}s por requisição")
+    print(f"sequencial: {sequencial * 1e3:8.1f} ms")
+    print(f"paralelo:   {paralelo * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Servidor HTTP local que imita as APIs de sincronização, com dados
+sintéticos e atraso configurável por requisição. Responde com gzip quando
+o cliente aceita, com 304 quando o ETag enviado ainda vale e, nos
+funcionários e vínculos, só com o que mudou desde atualizado_desde.
+Recebe as batidas em salvar-batidas, com falhas de lote e rejeições
+parciais sorteadas (--taxa-falha-lote, --taxa-rejeicao).
+
+Uso (a partir da raiz do projeto):
+    python -m ferramentas.servidor_stub --porta 8765 --atraso 0.5
+    RH247_API_URL=http://127.0.0.1:8765 python main.py
+"""
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Marcadores SOI/EOI de JPEG: as fotos não vêm vazias, mas não têm rosto
+FOTO_PADRAO = base64.b64encode(b"\xff\xd8\xff\xd9").decode()
+
+
+def gerar_dados(estados=27, cidades=5570, entidades=50, funcionarios=2000, tamanho_foto=0, seed=42):
+    """
+    Listas sintéticas por endpoint, no formato das respostas reais ({"data": [...]}).
+    Com tamanho_foto > 0, cada funcionário traz uma foto de bytes aleatórios
+    desse tamanho, para simular o peso real do endpoint de funcionários.
+    """
+    rng = random.Random(seed)
+    funcionarios_lista = [
+        {
+            "id": i,
+            "nome": f"Funcionário {i}",
+            "numero_cpf": f"{i:011d}",
+            "foto_base64": base64.b64encode(rng.randbytes(tamanho_foto)).decode() if tamanho_foto else FOTO_PADRAO,
+        }
+        for i in range(1, funcionarios + 1)
+    ]
+    return {
+        "estados": [{"id": i, "name": f"Estado {i}"} for i in range(1, estados + 1)],
+        "municipios": [
+            {"id": i, "name": f"Município {i}", "estado_id": rng.randint(1, estados)}
+            for i in range(1, cidades + 1)
+        ],
+        "entidades": [
+            {"id": 2300000 + i, "name": f"Entidade {i}", "entidade_id": i} for i in range(1, entidades + 1)
+        ],
+        "funcionarios": funcionarios_lista,
+        "funcionarios-vinculos": [
+            {"id": f["id"], "funcionario_id": f["id"], "matricula": f"{f['id']:06d}", "status": "Ativo"}
+            for f in funcionarios_lista
+        ],
+    }
+
+
+# Endpoints com sincronização incremental (atualizado_desde / cursor / removidos)
+RECURSOS_DELTA = ("funcionarios", "funcionarios-vinculos")
+
+
+class ManipuladorStub(BaseHTTPRequestHandler):
+    def do_GET(self):
+        servidor = self.server
+        time.sleep(servidor.atraso)
+        url = urlsplit(self.path)
+        endpoint = url.path.strip("/").rsplit("/", 1)[-1]
+        if endpoint in RECURSOS_DELTA:
+            desde = parse_qs(url.query).get("atualizado_desde")
+            corpo = servidor.montar_delta(endpoint, int(desde[0]) if desde else None)
+            etag = '"%s"' % hashlib.md5(corpo).hexdigest()
+        else:
+            corpo, etag = servidor.corpos.get(endpoint, (None, None))
+        if corpo is None:
+            self.send_error(404)
+            return
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", etag)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            corpo = gzip.compress(corpo, compresslevel=5)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_POST(self):
+        servidor = self.server
+        time.sleep(servidor.atraso)
+        endpoint = urlsplit(self.path).path.strip("/").rsplit("/", 1)[-1]
+        if endpoint != "salvar-batidas":
+            self.send_error(404)
+            return
+        corpo = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            corpo = gzip.decompress(corpo)
+
+        resposta = servidor.receber_batidas(json.loads(corpo)["batidas"])
+        if resposta is None:
+            # Falha do lote inteiro
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        corpo = json.dumps(resposta).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+class ServidorStub(ThreadingHTTPServer):
+    """
+    Guarda os dados servidos. Nos RECURSOS_DELTA cada item tem a versão em
+    que mudou pela última vez; alterar()/remover() avançam a versão, que é
+    devolvida como cursor.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, endereco, atraso, dados, taxa_falha_lote=0.0, taxa_rejeicao=0.0, seed=42):
+        super().__init__(endereco, ManipuladorStub)
+        self.atraso = atraso
+        self.lock = threading.Lock()
+        # Batidas recebidas por chave: reenviar a mesma chave não duplica
+        self.batidas = {}
+        self.requisicoes_batidas = 0
+        self.taxa_falha_lote = taxa_falha_lote
+        self.taxa_rejeicao = taxa_rejeicao
+        self.rng = random.Random(seed)
+        self.versao = 1
+        self.itens = {}
+        self.removidos = {endpoint: {} for endpoint in RECURSOS_DELTA}
+        self.corpos = {}
+        for endpoint, itens in dados.items():
+            if endpoint in RECURSOS_DELTA:
+                self.itens[endpoint] = {item["id"]: (item, self.versao) for item in itens}
+            else:
+                corpo = json.dumps({"data": itens}).encode()
+                self.corpos[endpoint] = (corpo, '"%s"' % hashlib.md5(corpo).hexdigest())
+
+    def alterar(self, endpoint, item):
+        """Inclui ou substitui um item (pelo id) numa nova versão."""
+        with self.lock:
+            self.versao += 1
+            self.itens[endpoint][item["id"]] = (item, self.versao)
+            self.removidos[endpoint].pop(item["id"], None)
+
+    def remover(self, endpoint, item_id):
+        with self.lock:
+            self.versao += 1
+            self.itens[endpoint].pop(item_id, None)
+            self.removidos[endpoint][item_id] = self.versao
+
+    def receber_batidas(self, batidas):
+        """
+        Grava as batidas pela chave. Com taxa_falha_lote, sorteia lotes que
+        falham inteiros (None: responde 503); com taxa_rejeicao, batidas
+        rejeitadas numa resposta parcial.
+        """
+        with self.lock:
+            self.requisicoes_batidas += 1
+            if self.rng.random() < self.taxa_falha_lote:
+                return None
+            resposta = {"aceitas": [], "rejeitadas": []}
+            for batida in batidas:
+                if self.rng.random() < self.taxa_rejeicao:
+                    resposta["rejeitadas"].append({"chave": batida["chave"], "motivo": "erro temporário"})
+                else:
+                    self.batidas[batida["chave"]] = batida
+                    resposta["aceitas"].append(batida["chave"])
+            return resposta
+
+    def montar_delta(self, endpoint, desde):
+        """Sem `desde`, a lista completa; com ele, só o que mudou depois dessa versão."""
+        with self.lock:
+            documento = {
+                "data": [item for item, versao in self.itens[endpoint].values() if desde is None or versao > desde],
+                "cursor": str(self.versao),
+            }
+            if desde is not None:
+                documento["removidos"] = [i for i, versao in self.removidos[endpoint].items() if versao > desde]
+        return json.dumps(documento).encode()
+
+
+def criar_servidor(porta=8765, atraso=0.0, dados=None, taxa_falha_lote=0.0, taxa_rejeicao=0.0):
+    """ServidorStub pronto para serve_forever (porta 0 escolhe uma livre)."""
+    return ServidorStub(("127.0.0.1", porta), atraso, dados or gerar_dados(), taxa_falha_lote, taxa_rejeicao)
+
+
+def iniciar_em_segundo_plano(porta=0, atraso=0.0, dados=None, taxa_falha_lote=0.0, taxa_rejeicao=0.0):
+    """Sobe o servidor numa thread daemon; retorna (servidor, url_base)."""
+    servidor = criar_servidor(porta, atraso, dados, taxa_falha_lote, taxa_rejeicao)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--atraso", type=float, default=0.0, help="segundos de espera antes de cada resposta")
+    parser.add_argument("--funcionarios", type=int, default=2000)
+    parser.add_argument("--tamanho-foto", type=int, default=0, help="bytes de cada foto (0: foto mínima)")
+    parser.add_argument("--taxa-falha-lote", type=float, default=0.0, help="fração dos envios de batidas respondidos com 503")
+    parser.add_argument("--taxa-rejeicao", type=float, default=0.0, help="fração das batidas rejeitadas em cada envio")
+    args = parser.parse_args()
+
+    dados = gerar_dados(funcionarios=args.funcionarios, tamanho_foto=args.tamanho_foto)
+    servidor = criar_servidor(args.porta, args.atraso, dados, args.taxa_falha_lote, args.taxa_rejeicao)
+    print(f"Servidor stub em http://127.0.0.1:{servidor.server_address[1]} (atraso {args.atraso}s)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
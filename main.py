@@ -1,6 +1,6 @@
 import flet as ft
-import sqlite3
 import datetime
+import multiprocessing
 import asyncio
 import locale
 from telas.tela_administracao import criar_tela_administracao  # Importa a tela de administração
@@ -8,7 +8,7 @@ from telas.tela_registro_ponto import criar_tela_registro_ponto  # Importa a tel
 from telas.tela_prova_vida import criar_tela_prova_vida
 from telas.tela_cadastrar_funcionario import criar_tela_cadastrar_funcionario
 from telas.tela_sincronizar_batidas import criar_tela_sincronizar_batidas
-from updates_entidades import atualizar_entidades
+from updates_entidades import atualizar_entidades_em_segundo_plano
 from telas.tela_config_entidade import criar_tela_config_entidade
 from telas.tela_sincronizar_funcionarios import criar_tela_sincronizar_funcionarios
 
@@ -16,13 +16,11 @@ from telas.tela_sincronizar_funcionarios import criar_tela_sincronizar_funcionar
 
 
 from criar_tabelas import criar_tabelas
-
-DB_PATH = "banco_de_dados.db"
-db_connection = sqlite3.connect("banco_de_dados.db", check_same_thread=False)
-
-
-
-# db_connection = sqlite3.connect("banco_de_dados.db")
+from servicos.banco_dados import DB_PATH
+from servicos.camera import obter_servico_camera
+from servicos.cadastro_hashes import iniciar_cadastro_em_segundo_plano
+from servicos.gravador_pontos import obter_gravador_pontos
+from servicos.arquivo_pontos import iniciar_arquivamento_em_segundo_plano
 
 # Configurar o locale para português
 locale.setlocale(locale.LC_TIME, "pt_BR.UTF-8")
@@ -114,15 +112,23 @@ def criar_tela_login(page):
             )
         ],
     )
-    
-# Conexão única com o banco
-conn = sqlite3.connect("banco_dados.db")
+
 
 def main(page: ft.Page):
     # Chamar a função para criar ou atualizar as tabelas no banco de dados
     criar_tabelas(DB_PATH)
-    atualizar_entidades(DB_PATH)
-    
+    # Reaplica batidas que ficaram só no journal e inicia o gravador
+    obter_gravador_pontos()
+    # Estados/cidades/entidades: só se vencidos, fora da thread da UI
+    atualizar_entidades_em_segundo_plano(DB_PATH)
+
+    # Abre a câmera antes da primeira batida de ponto
+    obter_servico_camera().aquecer()
+
+    # Retoma o cálculo de hashes de funcionários importados que ficou pendente
+    iniciar_cadastro_em_segundo_plano(DB_PATH)
+    # Move batidas sincronizadas antigas para as tabelas mensais de arquivo
+    iniciar_arquivamento_em_segundo_plano(DB_PATH)
     
     # Configurações da página
     page.title = "RH247"
@@ -195,7 +201,7 @@ def main(page: ft.Page):
                 )
             )
         elif rota == "/config_entidade":
-            page.views.append(criar_tela_config_entidade(page, db_path="banco_de_dados.db"))
+            page.views.append(criar_tela_config_entidade(page, db_path=DB_PATH))
         elif rota == "/sincronizar_funcionarios":
             page.views.append(criar_tela_sincronizar_funcionarios(page, DB_PATH))
         elif rota == "/sincronizar":
@@ -205,7 +211,7 @@ def main(page: ft.Page):
         elif rota == "/login":
             page.views.append(criar_tela_login(page))
         elif rota == "/administracao":
-            page.views.append(criar_tela_administracao(page, db_connection))
+            page.views.append(criar_tela_administracao(page, DB_PATH))
         elif rota == "/registro_ponto":
             page.views.append(criar_tela_registro_ponto(page, DB_PATH))  # Vai para a tela de registro de ponto
         elif rota == "/prova_vida":
@@ -225,4 +231,8 @@ def main(page: ft.Page):
 
     asyncio.run(atualizar_relogio())
 
-ft.app(target=main)
+# O pool de processos do cadastro de hashes (spawn) reimporta este módulo
+if __name__ == "__main__":
+    # No executável empacotado, os processos do pool iniciam por aqui
+    multiprocessing.freeze_support()
+    ft.app(target=main)
@@ -0,0 +1,129 @@
+import datetime
+import re
+import threading
+from configuracoes import DIAS_RETENCAO_PONTOS
+from servicos.banco_dados import DB_PATH, fechar_conexao, obter_conexao
+
+PREFIXO_ARQUIVO = "ponto_arquivo_"
+VISAO_COMPLETA = "ponto_final_completo"
+
+_lock_execucao = threading.Lock()
+
+
+def listar_tabelas_arquivo(conn):
+    """Tabelas ponto_arquivo_AAAAMM existentes, em ordem cronológica."""
+    linhas = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ? ORDER BY name",
+        (PREFIXO_ARQUIVO + "%",),
+    ).fetchall()
+    return [nome for (nome,) in linhas if re.fullmatch(PREFIXO_ARQUIVO + r"\d{6}", nome)]
+
+
+def recriar_visao_completa(conn):
+    """
+    Recria a view ponto_final_completo: ponto_final (quente) UNION ALL as
+    tabelas mensais de arquivo, com as mesmas colunas, para relatórios.
+    """
+    selects = ["SELECT id, data_ponto, funcionario_vinculo_id, sincronizado, chave FROM ponto_final"]
+    selects += [
+        f"SELECT id, data_ponto, funcionario_vinculo_id, 1 AS sincronizado, chave FROM {tabela}"
+        for tabela in listar_tabelas_arquivo(conn)
+    ]
+    conn.execute(f"DROP VIEW IF EXISTS {VISAO_COMPLETA}")
+    conn.execute(f"CREATE VIEW {VISAO_COMPLETA} AS " + " UNION ALL ".join(selects))
+
+
+def _criar_tabela_arquivo(conn, tabela):
+    # Sem a coluna sincronizado (sempre 1 no arquivo) e só com o índice por data
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {tabela} (
+            id INTEGER PRIMARY KEY NOT NULL,
+            data_ponto DATETIME NOT NULL,
+            funcionario_vinculo_id INTEGER NOT NULL,
+            chave VARCHAR(32)
+        )
+        """
+    )
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabela}_data ON {tabela} (data_ponto)")
+
+
+def arquivar_pontos(db_path=DB_PATH, dias_retencao=DIAS_RETENCAO_PONTOS, hoje=None):
+    """
+    Move as batidas sincronizadas com mais de `dias_retencao` dias de
+    ponto_final para as tabelas mensais ponto_arquivo_AAAAMM, um mês por
+    transação (cópia + exclusão juntas: uma interrupção não perde nem
+    duplica batidas). Batidas pendentes nunca são movidas.
+    Retorna {tabela: batidas movidas}.
+    """
+    hoje = hoje or datetime.date.today()
+    corte = (hoje - datetime.timedelta(days=dias_retencao)).strftime("%Y-%m-%d")
+    conn = obter_conexao(db_path)
+
+    # Usa o índice idx_ponto_final_sincronizado_data
+    meses = [
+        mes for (mes,) in conn.execute(
+            """
+            SELECT DISTINCT substr(data_ponto, 1, 7) FROM ponto_final
+            WHERE sincronizado = 1 AND data_ponto < ?
+            """,
+            (corte,),
+        )
+    ]
+
+    movidas = {}
+    for mes in meses:
+        if not re.fullmatch(r"\d{4}-\d{2}", mes or ""):
+            continue
+        ano, numero_mes = int(mes[:4]), int(mes[5:])
+        inicio = f"{mes}-01"
+        proximo = f"{ano + numero_mes // 12:04d}-{numero_mes % 12 + 1:02d}-01"
+        fim = min(proximo, corte)
+        tabela = f"{PREFIXO_ARQUIVO}{ano:04d}{numero_mes:02d}"
+
+        with conn:
+            nova = tabela not in listar_tabelas_arquivo(conn)
+            _criar_tabela_arquivo(conn, tabela)
+            conn.execute(
+                f"""
+                INSERT OR IGNORE INTO {tabela} (id, data_ponto, funcionario_vinculo_id, chave)
+                SELECT id, data_ponto, funcionario_vinculo_id, chave FROM ponto_final
+                WHERE sincronizado = 1 AND data_ponto >= ? AND data_ponto < ?
+                """,
+                (inicio, fim),
+            )
+            cursor = conn.execute(
+                "DELETE FROM ponto_final WHERE sincronizado = 1 AND data_ponto >= ? AND data_ponto < ?",
+                (inicio, fim),
+            )
+            movidas[tabela] = cursor.rowcount
+            if nova:
+                recriar_visao_completa(conn)
+
+    existe_visao = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = ?", (VISAO_COMPLETA,)
+    ).fetchone()
+    if not existe_visao:
+        with conn:
+            recriar_visao_completa(conn)
+    return movidas
+
+
+def iniciar_arquivamento_em_segundo_plano(db_path=DB_PATH):
+    """Roda arquivar_pontos numa thread daemon (ignorado se já estiver rodando)."""
+    if not _lock_execucao.acquire(blocking=False):
+        return False
+
+    def executar():
+        try:
+            movidas = arquivar_pontos(db_path)
+            if movidas:
+                print(f"[INFO] Batidas arquivadas: {movidas}")
+        except Exception as e:
+            print(f"[ERROR] Falha ao arquivar batidas: {e}")
+        finally:
+            fechar_conexao(db_path)
+            _lock_execucao.release()
+
+    threading.Thread(target=executar, daemon=True).start()
+    return True
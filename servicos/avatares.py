@@ -0,0 +1,36 @@
+import os
+import base64
+from functools import lru_cache
+from servicos.banco_dados import consultar_um
+
+DEFAULT_IMAGE_PATH = "assets/default_image.jpg"
+
+
+@lru_cache(maxsize=1)
+def obter_imagem_padrao_base64():
+    """Imagem padrão em base64, usada quando o funcionário não tem foto."""
+    if os.path.exists(DEFAULT_IMAGE_PATH):
+        with open(DEFAULT_IMAGE_PATH, "rb") as f:
+            return base64.b64encode(f.read()).decode("utf-8")
+    return ""
+
+
+@lru_cache(maxsize=128)
+def obter_avatar_base64(db_path, funcionario_id):
+    """
+    Carrega sob demanda a foto de um único funcionário, já em base64.
+    Os avatares mais recentes ficam em cache (LRU) para não voltar ao banco
+    quando o mesmo funcionário bate o ponto novamente.
+    """
+    resultado = consultar_um(
+        "SELECT foto_blob FROM funcionarios WHERE funcionario_id = ?", (funcionario_id,), db_path=db_path
+    )
+
+    if resultado and resultado[0]:
+        return base64.b64encode(resultado[0]).decode("utf-8")
+    return obter_imagem_padrao_base64()
+
+
+def invalidar_avatares():
+    """Descarta o cache de avatares (chamar após alterar fotos no banco)."""
+    obter_avatar_base64.cache_clear()
@@ -0,0 +1,86 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DB_PATH = "banco_de_dados.db"
+
+# Espera por um lock de escrita antes de levantar "database is locked"
+BUSY_TIMEOUT_MS = 5000
+# Negativo = KiB (cerca de 16 MB de cache de páginas por conexão)
+CACHE_SIZE_KIB = 16000
+# Statements preparados mantidos por conexão (reaproveitados pelo texto do SQL)
+CACHED_STATEMENTS = 256
+
+_local = threading.local()
+
+
+def _abrir_conexao(db_path):
+    conn = sqlite3.connect(
+        db_path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=CACHED_STATEMENTS,
+    )
+    # WAL: leitores não bloqueiam o escritor e vice-versa, então a gravação
+    # de batidas não trava a leitura das telas de sincronização
+    conn.execute("PRAGMA journal_mode = WAL")
+    # Em WAL, NORMAL só perde a última transação numa queda de energia, sem corromper o banco
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    # INSERT OR REPLACE dispara os triggers de DELETE (mantém o índice FTS5 em sincronia)
+    conn.execute("PRAGMA recursive_triggers = ON")
+    return conn
+
+
+def obter_conexao(db_path=DB_PATH):
+    """
+    Conexão da thread atual com o banco informado. Cada thread (UI,
+    pipeline da câmera, jobs em segundo plano) tem a sua, aberta na
+    primeira chamada e reaproveitada depois: não feche a conexão retornada.
+    """
+    conexoes = getattr(_local, "conexoes", None)
+    if conexoes is None:
+        conexoes = _local.conexoes = {}
+    conn = conexoes.get(db_path)
+    if conn is None:
+        conn = conexoes[db_path] = _abrir_conexao(db_path)
+    return conn
+
+
+def fechar_conexao(db_path=DB_PATH):
+    """Fecha a conexão da thread atual (para threads que terminam antes do app)."""
+    conexoes = getattr(_local, "conexoes", {})
+    conn = conexoes.pop(db_path, None)
+    if conn is not None:
+        conn.close()
+
+
+@contextmanager
+def transacao(db_path=DB_PATH):
+    """Executa o bloco numa transação: commit ao final, rollback em caso de erro."""
+    conn = obter_conexao(db_path)
+    with conn:
+        yield conn
+
+
+def consultar(sql, parametros=(), db_path=DB_PATH):
+    """Executa um SELECT e retorna todas as linhas."""
+    return obter_conexao(db_path).execute(sql, parametros).fetchall()
+
+
+def consultar_um(sql, parametros=(), db_path=DB_PATH):
+    """Executa um SELECT e retorna a primeira linha (ou None)."""
+    return obter_conexao(db_path).execute(sql, parametros).fetchone()
+
+
+def executar(sql, parametros=(), db_path=DB_PATH):
+    """Executa um comando de escrita e faz commit. Retorna o cursor."""
+    with transacao(db_path) as conn:
+        return conn.execute(sql, parametros)
+
+
+def executar_muitos(sql, sequencia_parametros, db_path=DB_PATH):
+    """Executa o mesmo comando para cada conjunto de parâmetros numa única transação."""
+    with transacao(db_path) as conn:
+        return conn.executemany(sql, sequencia_parametros)
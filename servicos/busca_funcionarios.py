@@ -0,0 +1,152 @@
+import re
+from servicos.banco_dados import DB_PATH, consultar, consultar_um
+
+LIMITE_RESULTADOS = 50
+# O bm25 só ordena buscas com até N casamentos. Prefixos curtos ("jo")
+# casam dezenas de milhares de nomes: ranquear (ou juntar com funcionarios
+# e ordenar por nome) todos eles leva 15-50 ms em 100k funcionários, e a
+# relevância nesses casos não diz nada. Acima do limite os casamentos são
+# paginados na ordem do índice FTS5 (funcionario_id), sem corte; medido com
+# ferramentas.bench_busca, toda consulta fica abaixo de 10 ms em 100k.
+LIMITE_RANQUEAMENTO = 1000
+
+_TERMO = re.compile(r"[^\W_]+")
+
+
+def montar_consulta_fts(texto):
+    """
+    Converte o texto digitado numa consulta FTS5 de prefixos: cada palavra
+    vira "palavra"* e todas precisam casar ("jo sil" encontra "João da
+    Silva"). Retorna None se não sobrar nenhuma palavra.
+    """
+    termos = _TERMO.findall(texto)
+    if not termos:
+        return None
+    return " ".join(f'"{termo}"*' for termo in termos)
+
+
+def ranquear_por_relevancia(consulta_fts, db_path=DB_PATH):
+    """True se a consulta casa até LIMITE_RANQUEAMENTO nomes (contagem parada no limite)."""
+    return consultar_um(
+        """
+        SELECT COUNT(*) FROM (
+            SELECT rowid FROM funcionarios_busca WHERE funcionarios_busca MATCH ? LIMIT ?
+        )
+        """,
+        (consulta_fts, LIMITE_RANQUEAMENTO + 1),
+        db_path=db_path,
+    )[0] <= LIMITE_RANQUEAMENTO
+
+
+def fts5_disponivel(db_path=DB_PATH):
+    """True se a migração criou o índice funcionarios_busca (SQLite com FTS5)."""
+    return consultar_um(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'funcionarios_busca'",
+        db_path=db_path,
+    ) is not None
+
+
+def _paginar(linhas, limite):
+    """
+    Separa a página das colunas de chave. Cada linha vem como
+    (nome, matricula, cpf, *chave); retorna (itens, chave do último item
+    ou None se não houver próxima página).
+    """
+    pagina = linhas[:limite]
+    itens = [linha[:3] for linha in pagina]
+    proxima = tuple(pagina[-1][3:]) if len(linhas) > limite else None
+    return itens, proxima
+
+
+def buscar_funcionarios(filtro, valor, apos=None, limite=LIMITE_RESULTADOS, db_path=DB_PATH):
+    """
+    Busca uma página de funcionários para a tela de sincronização, com
+    paginação por chave (keyset): `apos` é a chave retornada pela página
+    anterior, então cada página custa o mesmo, sem OFFSET.
+    Retorna (lista de (nome, matricula, cpf), chave da próxima página ou None).
+      - cpf: só os dígitos, busca exata pelo índice idx_funcionarios_cpf
+      - matricula: busca exata pelo índice idx_funcionarios_matricula
+      - nome: prefixos sem acento pelo FTS5, ordenados por relevância até
+        LIMITE_RANQUEAMENTO casamentos; acima disso, todos os casamentos por
+        funcionario_id (com fallback para LIKE se o FTS5 não existir)
+    """
+    valor = (valor or "").strip()
+
+    if filtro in ("cpf", "matricula"):
+        chave = re.sub(r"\D", "", valor) if filtro == "cpf" else valor
+        linhas = consultar(
+            f"""
+            SELECT nome, matricula, cpf, funcionario_id FROM funcionarios
+            WHERE {filtro} = ? AND funcionario_id > ?
+            ORDER BY funcionario_id
+            LIMIT ?
+            """,
+            (chave, apos[0] if apos else -1, limite + 1),
+            db_path=db_path,
+        )
+        return _paginar(linhas, limite)
+
+    consulta_fts = montar_consulta_fts(valor)
+    if consulta_fts is not None and fts5_disponivel(db_path):
+        # A primeira página escolhe a ordem; as seguintes seguem a da chave
+        # recebida, mesmo que a contagem mude no meio da paginação
+        if apos is None and ranquear_por_relevancia(consulta_fts, db_path) or apos and len(apos) == 2:
+            # (rank, rowid) ordena de forma total os casamentos ranqueados
+            condicao = "WHERE (b.rank, b.rowid) > (?, ?)" if apos else ""
+            linhas = consultar(
+                f"""
+                SELECT f.nome, f.matricula, f.cpf, b.rank, b.rowid
+                FROM (
+                    SELECT rowid, rank FROM funcionarios_busca
+                    WHERE funcionarios_busca MATCH ?
+                ) b
+                JOIN funcionarios f ON f.funcionario_id = b.rowid
+                {condicao}
+                ORDER BY b.rank, b.rowid
+                LIMIT ?
+                """,
+                (consulta_fts, *(apos or ()), limite + 1),
+                db_path=db_path,
+            )
+            return _paginar(linhas, limite)
+
+        # Muitos casamentos: o FTS5 já os devolve por rowid, então a página só lê `limite` linhas
+        condicao = "AND rowid > ?" if apos else ""
+        linhas = consultar(
+            f"""
+            SELECT f.nome, f.matricula, f.cpf, b.rowid
+            FROM (
+                SELECT rowid FROM funcionarios_busca
+                WHERE funcionarios_busca MATCH ? {condicao}
+                ORDER BY rowid
+                LIMIT ?
+            ) b
+            JOIN funcionarios f ON f.funcionario_id = b.rowid
+            ORDER BY b.rowid
+            """,
+            (consulta_fts, *(apos or ()), limite + 1),
+            db_path=db_path,
+        )
+        return _paginar(linhas, limite)
+
+    # Campo vazio (ou sem FTS5): ordem alfabética pelo índice idx_funcionarios_nome
+    condicoes = []
+    parametros = []
+    if consulta_fts is not None:
+        condicoes.append("nome LIKE ?")
+        parametros.append(f"%{valor}%")
+    if apos:
+        condicoes.append("(nome, funcionario_id) > (?, ?)")
+        parametros.extend(apos)
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    linhas = consultar(
+        f"""
+        SELECT nome, matricula, cpf, nome, funcionario_id FROM funcionarios
+        {where}
+        ORDER BY nome, funcionario_id
+        LIMIT ?
+        """,
+        (*parametros, limite + 1),
+        db_path=db_path,
+    )
+    return _paginar(linhas, limite)
@@ -0,0 +1,156 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import cv2
+import numpy as np
+from servicos.banco_dados import consultar_um, fechar_conexao, obter_conexao
+from servicos.galeria_hashes import invalidar_galeria
+from servicos.hash_facial import gerar_hash_facial
+
+# Foto processada sem rosto detectável: não é reprocessada e fica fora da galeria
+SEM_ROSTO = b""
+TAMANHO_LOTE = 100
+
+_lock_execucao = threading.Lock()
+_backend_processo = None
+
+
+def _obter_backend():
+    """Detector de rosto do processo trabalhador (criado uma vez por processo)."""
+    global _backend_processo
+    if _backend_processo is None:
+        from servicos.deteccao_faces import criar_backend
+        _backend_processo = criar_backend()
+    return _backend_processo
+
+
+def calcular_hash_foto(item):
+    """
+    Executado no pool de processos: decodifica a foto, detecta o maior
+    rosto e gera o mesmo pHash da captura em tela_cadastrar_funcionario.
+    Retorna (funcionario_id, hash de 8 bytes ou SEM_ROSTO).
+    """
+    funcionario_id, foto_blob = item
+    if not foto_blob:
+        return funcionario_id, SEM_ROSTO
+
+    imagem = cv2.imdecode(np.frombuffer(foto_blob, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if imagem is None:
+        return funcionario_id, SEM_ROSTO
+
+    # Fotos de cadastro costumam ser recortes do rosto: exige ao menos 20% do lado menor
+    lado_minimo = max(30, int(min(imagem.shape[:2]) * 0.2))
+    rostos = _obter_backend().detectar(imagem, min_size=(lado_minimo, lado_minimo))
+    if not rostos:
+        return funcionario_id, SEM_ROSTO
+
+    x, y, w, h = max(rostos, key=lambda r: r[2] * r[3])
+    return funcionario_id, gerar_hash_facial(imagem[y:y+h, x:x+w])
+
+
+def _criar_pool(processos):
+    """Pool de processos para os hashes, ou None se não der para criar processos aqui."""
+    # spawn: o app tem threads (câmera, UI) que não devem ser copiadas por fork
+    try:
+        return ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context("spawn"))
+    except (OSError, ValueError, NotImplementedError) as e:
+        print(f"[AVISO] Pool de processos indisponível, hashes calculados nesta thread: {e!r}")
+        return None
+
+
+def contar_pendentes(db_path):
+    return consultar_um("SELECT COUNT(*) FROM funcionarios WHERE embedding IS NULL AND ativo = 1", db_path=db_path)[0]
+
+
+def processar_pendentes(db_path, tamanho_lote=TAMANHO_LOTE, processos=None, ao_progresso=None):
+    """
+    Calcula os hashes faciais dos funcionários ativos com embedding NULL
+    (importados da web ou com foto nova), num pool de processos; se o pool
+    não subir (ou quebrar), os lotes seguem na própria thread. Os
+    resultados são gravados e commitados a cada lote, então os funcionários
+    ficam reconhecíveis à medida que o trabalho avança e uma interrupção
+    não perde o que já foi feito. ao_progresso(processados, total) é chamado após cada lote.
+    Retorna (processados, com_rosto).
+    """
+    total = contar_pendentes(db_path)
+    processados = 0
+    com_rosto = 0
+    if total == 0:
+        return processados, com_rosto
+
+    conn = obter_conexao(db_path)
+    executor = _criar_pool(processos)
+    try:
+        cursor = conn.cursor()
+        ultimo_id = -1
+        while True:
+            cursor.execute(
+                """
+                SELECT funcionario_id, foto_blob FROM funcionarios
+                WHERE embedding IS NULL AND ativo = 1 AND funcionario_id > ?
+                ORDER BY funcionario_id
+                LIMIT ?
+                """,
+                (ultimo_id, tamanho_lote),
+            )
+            lote = cursor.fetchall()
+            if not lote:
+                break
+
+            resultados = None
+            if executor is not None:
+                try:
+                    resultados = list(executor.map(calcular_hash_foto, lote))
+                except (BrokenProcessPool, OSError) as e:
+                    # Ex.: executável congelado sem freeze_support, ou processos bloqueados
+                    print(f"[AVISO] Pool de processos falhou, hashes calculados nesta thread: {e!r}")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = None
+            if resultados is None:
+                resultados = [calcular_hash_foto(item) for item in lote]
+
+            cursor.executemany(
+                "UPDATE funcionarios SET embedding = ? WHERE funcionario_id = ? AND embedding IS NULL",
+                [(embedding, funcionario_id) for funcionario_id, embedding in resultados],
+            )
+            conn.commit()
+
+            ultimo_id = lote[-1][0]
+            processados += len(lote)
+            com_rosto_lote = sum(1 for _, embedding in resultados if embedding)
+            com_rosto += com_rosto_lote
+            if com_rosto_lote:
+                # Os novos hashes entram na próxima batida de ponto
+                invalidar_galeria(db_path)
+            if ao_progresso:
+                ao_progresso(processados, total)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return processados, com_rosto
+
+
+def iniciar_cadastro_em_segundo_plano(db_path, ao_progresso=None, ao_concluir=None):
+    """
+    Roda processar_pendentes numa thread daemon. Se já houver uma execução
+    em andamento, não inicia outra e retorna False.
+    ao_concluir(processados, com_rosto) é chamado ao final.
+    """
+    if not _lock_execucao.acquire(blocking=False):
+        return False
+
+    def executar():
+        try:
+            processados, com_rosto = processar_pendentes(db_path, ao_progresso=ao_progresso)
+            if ao_concluir:
+                ao_concluir(processados, com_rosto)
+        except Exception as e:
+            print(f"[ERROR] Falha ao calcular hashes faciais: {e}")
+        finally:
+            fechar_conexao(db_path)
+            _lock_execucao.release()
+
+    threading.Thread(target=executar, daemon=True).start()
+    return True
@@ -0,0 +1,166 @@
+import threading
+import time
+import cv2
+from configuracoes import FONTE_CAMERA
+from servicos.fontes_camera import criar_fonte
+
+HAAR_CASCADE_PATH = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+
+_lock_servicos = threading.Lock()
+_servico_camera = None
+
+
+def obter_servico_camera():
+    """Serviço de câmera compartilhado por todas as telas."""
+    global _servico_camera
+    with _lock_servicos:
+        if _servico_camera is None:
+            _servico_camera = ServicoCamera()
+        return _servico_camera
+
+
+class AssinaturaCamera:
+    """Acesso de uma tela aos frames do ServicoCamera. Cancelar ao sair da tela."""
+
+    def __init__(self, servico):
+        self._servico = servico
+        self._ultimo_seq = 0
+        self.ativa = True
+
+    def aguardar_camera(self, timeout=5.0):
+        """Espera o dispositivo abrir. Retorna False se a câmera não estiver acessível."""
+        return self._servico.aguardar_abertura(timeout)
+
+    def proximo_frame(self, timeout=1.0):
+        """
+        Bloqueia até existir um frame mais novo que o último entregue a esta
+        assinatura. Retorna uma cópia do frame (a tela pode desenhar nela) ou
+        None em caso de timeout/câmera indisponível.
+        """
+        return self._servico._aguardar_frame(self, timeout)
+
+    def cancelar(self):
+        if self.ativa:
+            self.ativa = False
+            self._servico._remover_assinatura(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cancelar()
+
+
+class ServicoCamera:
+    """
+    Mantém o VideoCapture aberto e aquecido durante toda a execução do app.
+    Uma thread leitora publica o frame mais recente para as assinaturas;
+    a contagem de assinaturas garante que as telas nunca disputem o
+    dispositivo. Sem assinantes, a câmera continua aberta e apenas descarta
+    frames (grab), para que o primeiro frame da próxima tela saia na hora.
+    """
+
+    def __init__(self, fonte=FONTE_CAMERA):
+        self.fonte = fonte  # ver servicos.fontes_camera.criar_fonte
+        self.erro = None
+        self._condicao = threading.Condition()
+        self._assinaturas = set()
+        self._frame = None
+        self._seq = 0
+        self._thread = None
+        self._rodando = False
+        self._abertura_concluida = threading.Event()
+
+    @property
+    def num_assinantes(self):
+        with self._condicao:
+            return len(self._assinaturas)
+
+    def aquecer(self):
+        """Abre o dispositivo em segundo plano, se ainda não estiver aberto."""
+        with self._condicao:
+            if self._rodando:
+                return
+            self._rodando = True
+            self.erro = None
+            self._abertura_concluida.clear()
+            self._thread = threading.Thread(target=self._loop_leitura, daemon=True)
+            self._thread.start()
+
+    def aguardar_abertura(self, timeout=5.0):
+        self._abertura_concluida.wait(timeout)
+        with self._condicao:
+            return self._rodando and self.erro is None and self._abertura_concluida.is_set()
+
+    def assinar(self):
+        """Registra uma nova assinatura (referência) e garante a câmera ligada."""
+        assinatura = AssinaturaCamera(self)
+        with self._condicao:
+            self._assinaturas.add(assinatura)
+            assinatura._ultimo_seq = self._seq
+        self.aquecer()
+        return assinatura
+
+    def encerrar(self):
+        """Libera o dispositivo (encerramento do app)."""
+        with self._condicao:
+            self._rodando = False
+            self._condicao.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def _remover_assinatura(self, assinatura):
+        with self._condicao:
+            self._assinaturas.discard(assinatura)
+            self._condicao.notify_all()
+
+    def _aguardar_frame(self, assinatura, timeout):
+        with self._condicao:
+            self._condicao.wait_for(
+                lambda: self._seq > assinatura._ultimo_seq or not self._rodando or not assinatura.ativa,
+                timeout,
+            )
+            if self._seq <= assinatura._ultimo_seq or self._frame is None:
+                return None
+            assinatura._ultimo_seq = self._seq
+            return self._frame.copy()
+
+    def _loop_leitura(self):
+        cap = criar_fonte(self.fonte)
+        if not cap.isOpened():
+            with self._condicao:
+                self.erro = "Não foi possível acessar a câmera."
+                self._rodando = False
+                self._condicao.notify_all()
+            self._abertura_concluida.set()
+            return
+
+        self._abertura_concluida.set()
+        try:
+            while True:
+                with self._condicao:
+                    if not self._rodando:
+                        break
+                    tem_assinantes = bool(self._assinaturas)
+
+                if not tem_assinantes:
+                    # Mantém o stream ativo e o buffer do driver vazio, sem decodificar
+                    if not cap.grab():
+                        time.sleep(0.01)
+                    continue
+
+                ret, frame = cap.read()
+                if not ret:
+                    time.sleep(0.01)
+                    continue
+
+                with self._condicao:
+                    self._frame = frame
+                    self._seq += 1
+                    self._condicao.notify_all()
+        finally:
+            cap.release()
+            with self._condicao:
+                self._rodando = False
+                self._frame = None
+                self._condicao.notify_all()
@@ -0,0 +1,178 @@
+import asyncio
+import gzip
+import json
+import threading
+import httpx
+from configuracoes import API_URL_BASE
+
+# Pool compartilhado: conexões mantidas vivas entre sincronizações
+LIMITES = httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60.0)
+TIMEOUT_PADRAO = httpx.Timeout(10.0, connect=3.05)
+# Endpoints grandes (funcionários vêm com foto em base64) têm mais tempo de leitura
+TIMEOUTS_POR_ENDPOINT = {
+    "estados": httpx.Timeout(10.0, connect=3.05),
+    "municipios": httpx.Timeout(20.0, connect=3.05),
+    "entidades": httpx.Timeout(10.0, connect=3.05),
+    "funcionarios-vinculos": httpx.Timeout(30.0, connect=3.05),
+    "funcionarios": httpx.Timeout(120.0, connect=3.05),
+    "salvar-batidas": httpx.Timeout(30.0, connect=3.05),
+}
+# Respostas em fluxo: tamanho de cada pedaço de texto e quantos podem esperar na fila
+TAMANHO_PEDACO = 64 * 1024
+PEDACOS_EM_ESPERA = 4
+
+_lock_cliente = threading.Lock()
+_cliente_api = None
+
+
+def obter_cliente_api():
+    """Cliente HTTP compartilhado pelas sincronizações (iniciado na primeira chamada)."""
+    global _cliente_api
+    with _lock_cliente:
+        if _cliente_api is None:
+            _cliente_api = ClienteAPI()
+        return _cliente_api
+
+
+class ClienteAPI:
+    """
+    Cliente assíncrono (httpx) das APIs de sincronização.
+
+    O AsyncClient e seu pool de conexões vivem num event loop próprio,
+    numa thread daemon, então qualquer thread (UI, jobs em segundo plano)
+    pode usá-lo com buscar()/buscar_varios() sem criar outro loop nem
+    abrir conexões novas a cada chamada. gzip e keep-alive são do httpx.
+    """
+
+    def __init__(self, url_base=API_URL_BASE, transport=None):
+        self.url_base = url_base
+        self._transport = transport
+        self._cliente = None
+        self._loop = asyncio.new_event_loop()
+        self._pronto = threading.Event()
+        self._thread = threading.Thread(target=self._executar_loop, daemon=True)
+        self._thread.start()
+        self._pronto.wait()
+
+    def _executar_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._cliente = httpx.AsyncClient(
+            base_url=self.url_base,
+            limits=LIMITES,
+            timeout=TIMEOUT_PADRAO,
+            headers={"Accept": "application/json", "Accept-Encoding": "gzip"},
+            transport=self._transport,
+        )
+        self._pronto.set()
+        self._loop.run_forever()
+
+    def executar(self, corotina):
+        """Roda a corotina no loop do cliente e bloqueia a thread atual até o resultado."""
+        return self.agendar(corotina).result()
+
+    async def obter(self, endpoint, params=None, cabecalhos=None):
+        """GET num endpoint relativo à url_base, com o timeout do endpoint."""
+        return await self._cliente.get(
+            endpoint,
+            params=params,
+            headers=cabecalhos,
+            timeout=TIMEOUTS_POR_ENDPOINT.get(endpoint, TIMEOUT_PADRAO),
+        )
+
+    async def postar_json(self, endpoint, dados, cabecalhos=None):
+        """POST de `dados` em JSON comprimido com gzip (Content-Encoding: gzip)."""
+        corpo = gzip.compress(json.dumps(dados).encode("utf-8"), compresslevel=6)
+        return await self._cliente.post(
+            endpoint,
+            content=corpo,
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip", **(cabecalhos or {})},
+            timeout=TIMEOUTS_POR_ENDPOINT.get(endpoint, TIMEOUT_PADRAO),
+        )
+
+    def agendar(self, corotina):
+        """Agenda a corotina no loop do cliente sem esperar; retorna um concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(corotina, self._loop)
+
+    async def _obter_varios(self, requisicoes):
+        nomes = list(requisicoes)
+        respostas = await asyncio.gather(
+            *(self.obter(*requisicoes[nome]) for nome in nomes),
+            return_exceptions=True,
+        )
+        return dict(zip(nomes, respostas))
+
+    def buscar(self, endpoint, params=None, cabecalhos=None):
+        """GET síncrono (para chamar de qualquer thread). Retorna o httpx.Response."""
+        return self.executar(self.obter(endpoint, params, cabecalhos))
+
+    def buscar_varios(self, requisicoes):
+        """
+        Faz os GETs independentes em paralelo e espera todos.
+        requisicoes: {nome: (endpoint, params, cabecalhos)}
+        Retorna {nome: httpx.Response ou a exceção daquela requisição}, então
+        a falha de um endpoint não descarta os demais.
+        """
+        return self.executar(self._obter_varios(requisicoes))
+
+    def transmitir_texto(self, endpoint, params=None, tamanho_pedaco=TAMANHO_PEDACO):
+        """
+        GET em fluxo: retorna um iterador síncrono dos pedaços de texto da
+        resposta (já sem gzip), sem carregá-la inteira. O download começa
+        na hora; a fila limitada segura o servidor enquanto ninguém consome.
+        Erros HTTP aparecem ao iterar; fechar() cancela o download.
+        """
+        fila = self.executar(self._criar_fila())
+        tarefa = asyncio.run_coroutine_threadsafe(
+            self._produzir_pedacos(endpoint, params, tamanho_pedaco, fila), self._loop
+        )
+        return FluxoTexto(self, fila, tarefa)
+
+    async def _criar_fila(self):
+        return asyncio.Queue(maxsize=PEDACOS_EM_ESPERA)
+
+    async def _produzir_pedacos(self, endpoint, params, tamanho_pedaco, fila):
+        try:
+            async with self._cliente.stream(
+                "GET", endpoint, params=params, timeout=TIMEOUTS_POR_ENDPOINT.get(endpoint, TIMEOUT_PADRAO)
+            ) as response:
+                response.raise_for_status()
+                async for pedaco in response.aiter_text(tamanho_pedaco):
+                    await fila.put(pedaco)
+            await fila.put(None)
+        except Exception as e:
+            await fila.put(e)
+
+    def encerrar(self):
+        if self._loop.is_running():
+            self.executar(self._cliente.aclose())
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5.0)
+
+
+class FluxoTexto:
+    """Iterador dos pedaços de uma resposta em fluxo (ver ClienteAPI.transmitir_texto)."""
+
+    def __init__(self, cliente, fila, tarefa):
+        self._cliente = cliente
+        self._fila = fila
+        self._tarefa = tarefa
+        self._terminou = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._terminou:
+            raise StopIteration
+        pedaco = self._cliente.executar(self._fila.get())
+        if pedaco is None or isinstance(pedaco, Exception):
+            self._terminou = True
+            if pedaco is None:
+                raise StopIteration
+            raise pedaco
+        return pedaco
+
+    def fechar(self):
+        """Cancela o download se ainda estiver em andamento (e libera a conexão)."""
+        self._terminou = True
+        self._tarefa.cancel()
@@ -0,0 +1,193 @@
+import cv2
+from configuracoes import DETECCAO_POR_TELA, DETECTOR_FACES
+from servicos.camera import HAAR_CASCADE_PATH
+
+# Menor janela do Haar cascade frontal; rostos menores que isso não são detectados
+JANELA_MINIMA_HAAR = 24
+
+
+def _escalar_caixa(caixa, fator, dx=0, dy=0):
+    x, y, w, h = caixa
+    return (int(x * fator) + dx, int(y * fator) + dy, int(w * fator), int(h * fator))
+
+
+class DetectorFaces:
+    """
+    Interface dos backends de detecção de rosto.
+    detectar(imagem, min_size, max_size) -> lista de rostos (x, y, w, h).
+    Se `usa_cinza` for True o backend recebe a imagem já em tons de cinza.
+    """
+
+    nome = ""
+    usa_cinza = False
+
+    def detectar(self, imagem, min_size=(0, 0), max_size=(0, 0)):
+        raise NotImplementedError
+
+
+class DetectorHaar(DetectorFaces):
+    """
+    Haar cascade frontal do OpenCV. Cada instância carrega o seu: o
+    detectMultiScale de um mesmo CascadeClassifier não pode rodar em duas
+    threads ao mesmo tempo (ex.: tela de ponto e cálculo de hashes).
+    """
+
+    nome = "haar"
+    usa_cinza = True
+
+    def __init__(self, scale_factor=1.1, min_neighbors=5):
+        self.classificador = cv2.CascadeClassifier(HAAR_CASCADE_PATH)
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+
+    def detectar(self, imagem, min_size=(0, 0), max_size=(0, 0)):
+        if imagem.ndim == 3:
+            imagem = cv2.cvtColor(imagem, cv2.COLOR_BGR2GRAY)
+        min_size = tuple(max(JANELA_MINIMA_HAAR, v) for v in min_size)
+        if max_size[0] and (min_size[0] > max_size[0] or min_size[1] > max_size[1]):
+            return []
+        rostos = self.classificador.detectMultiScale(
+            imagem,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=min_size,
+            maxSize=max_size,  # (0, 0) = sem limite
+        )
+        return [tuple(int(v) for v in r) for r in rostos]
+
+
+class DetectorMediaPipe(DetectorFaces):
+    """
+    BlazeFace via mediapipe. O modelo (face_detection_short_range.tflite)
+    vem dentro do pacote mediapipe, então não há download em tempo de
+    execução. Cada instância tem seu próprio grafo: não compartilhar entre
+    threads.
+    """
+
+    nome = "mediapipe"
+
+    def __init__(self, confianca_minima=0.5, modelo=0):
+        # Dependência opcional: só é importada quando o backend é escolhido
+        import mediapipe as mp
+
+        self._detector = mp.solutions.face_detection.FaceDetection(
+            model_selection=modelo,  # 0 = curta distância (até ~2 m), ideal para o totem
+            min_detection_confidence=confianca_minima,
+        )
+
+    def detectar(self, imagem, min_size=(0, 0), max_size=(0, 0)):
+        if imagem.ndim == 2:
+            rgb = cv2.cvtColor(imagem, cv2.COLOR_GRAY2RGB)
+        else:
+            rgb = cv2.cvtColor(imagem, cv2.COLOR_BGR2RGB)
+        resultado = self._detector.process(rgb)
+        if not resultado.detections:
+            return []
+
+        altura, largura = imagem.shape[:2]
+        rostos = []
+        for deteccao in resultado.detections:
+            caixa = deteccao.location_data.relative_bounding_box
+            x = max(0, int(caixa.xmin * largura))
+            y = max(0, int(caixa.ymin * altura))
+            w = min(largura - x, int(caixa.width * largura))
+            h = min(altura - y, int(caixa.height * altura))
+            if w < min_size[0] or h < min_size[1]:
+                continue
+            if max_size[0] and (w > max_size[0] or h > max_size[1]):
+                continue
+            rostos.append((x, y, w, h))
+        return rostos
+
+
+BACKENDS = {
+    DetectorHaar.nome: DetectorHaar,
+    DetectorMediaPipe.nome: DetectorMediaPipe,
+}
+
+
+def criar_backend(nome=None):
+    """Cria o backend configurado (configuracoes.DETECTOR_FACES) ou o informado."""
+    nome = nome or DETECTOR_FACES
+    if nome not in BACKENDS:
+        raise ValueError(f"Detector de rosto desconhecido: {nome}. Opções: {', '.join(BACKENDS)}")
+    return BACKENDS[nome]()
+
+
+def criar_detector_tela(tela, backend=None):
+    """DetectorRastreado com os parâmetros da tela em configuracoes.DETECCAO_POR_TELA."""
+    return DetectorRastreado(criar_backend(backend), **DETECCAO_POR_TELA[tela])
+
+
+class DetectorRastreado:
+    """
+    Detecção de rosto com rastreamento por região de interesse (ROI),
+    sobre qualquer backend DetectorFaces.
+
+    Sem rosto conhecido, o backend roda sobre o frame reduzido por `escala`.
+    Depois que um rosto é encontrado, os próximos frames procuram apenas
+    numa região ao redor da última caixa (ampliada por `margem_roi`) e com
+    tamanhos próximos ao do último rosto. A cada `redetectar_a_cada`
+    frames, ou quando o rosto se perde, volta a varrer o frame inteiro.
+
+    Com escala=1.0 e redetectar_a_cada=1 o comportamento é o da detecção
+    completa em todos os frames.
+    """
+
+    def __init__(self, backend, escala=0.5, margem_roi=0.5, redetectar_a_cada=10, min_size=(100, 100)):
+        self.backend = backend
+        self.escala = escala
+        self.margem_roi = margem_roi
+        self.redetectar_a_cada = redetectar_a_cada
+        self.min_size = min_size
+
+        self._ultimo_rosto = None
+        self._frames_desde_deteccao = 0
+
+    def reiniciar(self):
+        self._ultimo_rosto = None
+        self._frames_desde_deteccao = 0
+
+    def detectar(self, frame):
+        """Retorna a lista de rostos (x, y, w, h) em coordenadas do frame original."""
+        if self.backend.usa_cinza and frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        self._frames_desde_deteccao += 1
+        rostos = []
+        if self._ultimo_rosto is not None and self._frames_desde_deteccao < self.redetectar_a_cada:
+            rostos = self._detectar_roi(frame, self._ultimo_rosto)
+
+        if not rostos:
+            # Sem rastreamento ativo, rastreamento perdido ou hora de re-detectar
+            rostos = self._detectar_completo(frame)
+            self._frames_desde_deteccao = 0
+
+        self._ultimo_rosto = rostos[0] if rostos else None
+        return rostos
+
+    def _detectar_escalado(self, imagem, escala, min_size, max_size=(0, 0)):
+        if escala != 1.0:
+            imagem = cv2.resize(imagem, None, fx=escala, fy=escala, interpolation=cv2.INTER_AREA)
+        min_escalado = tuple(int(v * escala) for v in min_size)
+        max_escalado = tuple(int(v * escala) for v in max_size)
+        rostos = self.backend.detectar(imagem, min_escalado, max_escalado)
+        return [_escalar_caixa(r, 1.0 / escala) for r in rostos]
+
+    def _detectar_completo(self, imagem):
+        return self._detectar_escalado(imagem, self.escala, self.min_size)
+
+    def _detectar_roi(self, imagem, ultimo_rosto):
+        x, y, w, h = ultimo_rosto
+        altura, largura = imagem.shape[:2]
+        pad_x = int(w * self.margem_roi)
+        pad_y = int(h * self.margem_roi)
+        x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+        x1, y1 = min(largura, x + w + pad_x), min(altura, y + h + pad_y)
+
+        # O rosto rastreado muda pouco de tamanho entre frames
+        min_size = (max(self.min_size[0], int(w * 0.7)), max(self.min_size[1], int(h * 0.7)))
+        max_size = (int(w * 1.4), int(h * 1.4))
+
+        rostos = self._detectar_escalado(imagem[y0:y1, x0:x1], self.escala, min_size, max_size)
+        return [(rx + x0, ry + y0, rw, rh) for (rx, ry, rw, rh) in rostos]
@@ -0,0 +1,165 @@
+import asyncio
+import random
+import threading
+from concurrent.futures import as_completed
+import httpx
+from configuracoes import ENVIOS_SIMULTANEOS_BATIDAS, TAMANHO_LOTE_BATIDAS
+from servicos.banco_dados import DB_PATH, consultar, executar, executar_muitos, fechar_conexao
+from servicos.cliente_api import obter_cliente_api
+
+ENDPOINT_BATIDAS = "salvar-batidas"
+MAX_TENTATIVAS = 5
+# Backoff exponencial com jitter completo: espera sorteada em [0, min(MAXIMO, BASE * 2**tentativa)]
+ESPERA_BASE = 0.5
+ESPERA_MAXIMA = 30.0
+# Respostas em que o lote inteiro é reenviado
+STATUS_TEMPORARIOS = {408, 425, 429, 500, 502, 503, 504}
+# Ids por consulta em listar_batidas_pendentes (abaixo do limite de variáveis do SQLite)
+TAMANHO_BLOCO_IDS = 500
+
+_lock_envio = threading.Lock()
+
+
+def _espera(tentativa, response=None):
+    """Segundos até a próxima tentativa (respeita Retry-After em 429/503)."""
+    if response is not None:
+        try:
+            return min(float(response.headers["Retry-After"]), ESPERA_MAXIMA)
+        except (KeyError, ValueError):
+            pass
+    return random.uniform(0, min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** tentativa))
+
+
+async def _enviar_lote(cliente, lote, limite):
+    """
+    Envia um lote, reenviando com backoff o que não foi aceito: falha de
+    rede, status temporário ou batidas rejeitadas pelo servidor numa
+    resposta parcial. Como cada batida leva sua `chave`, reenviar uma
+    batida que o servidor já gravou não a duplica.
+    Retorna (chaves aceitas, {chave: motivo} das que continuam pendentes).
+    """
+    pendentes = {batida["chave"]: batida for batida in lote}
+    aceitas = []
+    motivos = {}
+    async with limite:
+        for tentativa in range(MAX_TENTATIVAS):
+            response = None
+            try:
+                response = await cliente.postar_json(ENDPOINT_BATIDAS, {"batidas": list(pendentes.values())})
+                if response.status_code in STATUS_TEMPORARIOS:
+                    motivos = dict.fromkeys(pendentes, f"HTTP {response.status_code}")
+                else:
+                    response.raise_for_status()
+                    resultado = response.json()
+                    if not isinstance(resultado, dict):
+                        raise ValueError(f"Resposta inesperada de {ENDPOINT_BATIDAS}: {type(resultado).__name__}")
+                    for chave in resultado.get("aceitas", []):
+                        if pendentes.pop(chave, None) is not None:
+                            aceitas.append(chave)
+                    motivos = {r["chave"]: r.get("motivo", "rejeitada") for r in resultado.get("rejeitadas", [])}
+                    # Batida que não veio em nenhuma das listas também continua pendente
+                    motivos = {chave: motivos.get(chave, "sem resposta") for chave in pendentes}
+            except httpx.HTTPStatusError as e:
+                # 4xx: o lote não vai passar repetindo
+                return aceitas, dict.fromkeys(pendentes, f"HTTP {e.response.status_code}")
+            except (httpx.HTTPError, ValueError, KeyError, TypeError, AttributeError) as e:
+                # Rede ou resposta malformada: tenta de novo
+                motivos = dict.fromkeys(pendentes, repr(e))
+
+            if not pendentes or tentativa == MAX_TENTATIVAS - 1:
+                break
+            await asyncio.sleep(_espera(tentativa, response))
+    return aceitas, motivos
+
+
+async def _criar_limite(envios_simultaneos):
+    # Criado dentro do loop do cliente, onde será usado
+    return asyncio.Semaphore(max(1, envios_simultaneos))
+
+
+def listar_batidas_pendentes(ids=None, db_path=DB_PATH):
+    """
+    Batidas com sincronizado = 0 (só as de `ids`, se informado), na ordem em
+    que foram registradas. Batidas antigas, de antes da coluna `chave`,
+    recebem uma chave aqui, antes do primeiro envio.
+    """
+    executar(
+        "UPDATE ponto_final SET chave = lower(hex(randomblob(16))) WHERE sincronizado = 0 AND chave IS NULL",
+        db_path=db_path,
+    )
+    sql = "SELECT data_ponto, id, chave, funcionario_vinculo_id FROM ponto_final WHERE sincronizado = 0"
+    if ids is None:
+        linhas = consultar(f"{sql} ORDER BY data_ponto, id", db_path=db_path)
+    else:
+        # Filtra no SQLite, em blocos de ids, e junta os blocos na ordem de registro
+        ids = sorted(ids)
+        linhas = []
+        for inicio in range(0, len(ids), TAMANHO_BLOCO_IDS):
+            bloco = ids[inicio:inicio + TAMANHO_BLOCO_IDS]
+            linhas += consultar(f"{sql} AND id IN ({', '.join('?' for _ in bloco)})", bloco, db_path=db_path)
+        linhas.sort()
+    return [
+        {"chave": chave, "data_ponto": data_ponto, "funcionario_vinculo_id": funcionario_vinculo_id}
+        for data_ponto, _, chave, funcionario_vinculo_id in linhas
+    ]
+
+
+def enviar_batidas(ids=None, db_path=DB_PATH, tamanho_lote=TAMANHO_LOTE_BATIDAS,
+                   envios_simultaneos=ENVIOS_SIMULTANEOS_BATIDAS, ao_progresso=None, cliente=None):
+    """
+    Envia as batidas pendentes (ou só as de `ids`) em lotes de
+    `tamanho_lote`, com até `envios_simultaneos` requisições em andamento.
+    As aceitas de cada lote são marcadas com sincronizado = 1 num único
+    executemany assim que o lote termina; as demais continuam pendentes
+    para a próxima sincronização. ao_progresso(enviadas, total) é chamado
+    após cada lote.
+    Retorna {"enviadas": n, "pendentes": n, "motivos": {chave: motivo}}.
+    """
+    cliente = cliente or obter_cliente_api()
+    batidas = listar_batidas_pendentes(ids, db_path)
+    resultado = {"enviadas": 0, "pendentes": 0, "motivos": {}}
+    if not batidas:
+        return resultado
+
+    lotes = [batidas[i:i + tamanho_lote] for i in range(0, len(batidas), tamanho_lote)]
+    limite = cliente.executar(_criar_limite(envios_simultaneos))
+    futuros = [cliente.agendar(_enviar_lote(cliente, lote, limite)) for lote in lotes]
+
+    for futuro in as_completed(futuros):
+        aceitas, motivos = futuro.result()
+        executar_muitos(
+            "UPDATE ponto_final SET sincronizado = 1 WHERE chave = ?",
+            [(chave,) for chave in aceitas],
+            db_path=db_path,
+        )
+        resultado["enviadas"] += len(aceitas)
+        resultado["pendentes"] += len(motivos)
+        resultado["motivos"].update(motivos)
+        if ao_progresso:
+            ao_progresso(resultado["enviadas"], len(batidas))
+    return resultado
+
+
+def enviar_batidas_em_segundo_plano(ids=None, db_path=DB_PATH, ao_progresso=None, ao_concluir=None):
+    """
+    Roda enviar_batidas numa thread daemon. Se já houver um envio em
+    andamento, não inicia outro e retorna False.
+    ao_concluir(resultado) é chamado ao final (None se o envio falhou).
+    """
+    if not _lock_envio.acquire(blocking=False):
+        return False
+
+    def executar_envio():
+        resultado = None
+        try:
+            resultado = enviar_batidas(ids, db_path, ao_progresso=ao_progresso)
+        except Exception as e:
+            print(f"[ERROR] Falha ao enviar batidas: {e}")
+        finally:
+            fechar_conexao(db_path)
+            _lock_envio.release()
+        if ao_concluir:
+            ao_concluir(resultado)
+
+    threading.Thread(target=executar_envio, daemon=True).start()
+    return True
@@ -0,0 +1,103 @@
+import os
+import time
+import cv2
+
+EXTENSOES_IMAGEM = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class FonteArquivo:
+    """
+    Base das fontes gravadas. Segue a interface usada do cv2.VideoCapture
+    (isOpened, read, grab, release), então o ServicoCamera trata uma
+    gravação exatamente como a webcam.
+
+    Com `tempo_real`, a leitura respeita o fps da gravação, simulando a
+    câmera; sem ele, os frames saem o mais rápido possível (benchmarks).
+    Com `repetir`, a gravação recomeça ao terminar.
+    """
+
+    def __init__(self, fps=15.0, tempo_real=True, repetir=True):
+        self.fps = fps
+        self.tempo_real = tempo_real
+        self.repetir = repetir
+        self._proximo_instante = None
+
+    def _aguardar_cadencia(self):
+        if not self.tempo_real:
+            return
+        agora = time.monotonic()
+        if self._proximo_instante is not None and agora < self._proximo_instante:
+            time.sleep(self._proximo_instante - agora)
+            agora = self._proximo_instante
+        self._proximo_instante = agora + 1.0 / self.fps
+
+    def grab(self):
+        ret, _ = self.read()
+        return ret
+
+
+class FonteVideo(FonteArquivo):
+    """Frames de um arquivo de vídeo."""
+
+    def __init__(self, caminho, tempo_real=True, repetir=True):
+        self._cap = cv2.VideoCapture(caminho)
+        fps = self._cap.get(cv2.CAP_PROP_FPS) or 15.0
+        super().__init__(fps=fps, tempo_real=tempo_real, repetir=repetir)
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def read(self):
+        self._aguardar_cadencia()
+        ret, frame = self._cap.read()
+        if not ret and self.repetir:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self._cap.read()
+        return ret, frame
+
+    def release(self):
+        self._cap.release()
+
+
+class FonteDiretorio(FonteArquivo):
+    """Frames de uma pasta de imagens, em ordem alfabética."""
+
+    def __init__(self, caminho, fps=15.0, tempo_real=True, repetir=True):
+        super().__init__(fps=fps, tempo_real=tempo_real, repetir=repetir)
+        self._arquivos = [
+            os.path.join(caminho, nome)
+            for nome in sorted(os.listdir(caminho))
+            if nome.lower().endswith(EXTENSOES_IMAGEM)
+        ]
+        self._posicao = 0
+
+    def isOpened(self):
+        return bool(self._arquivos)
+
+    def read(self):
+        self._aguardar_cadencia()
+        if self._posicao >= len(self._arquivos):
+            if not self.repetir or not self._arquivos:
+                return False, None
+            self._posicao = 0
+        frame = cv2.imread(self._arquivos[self._posicao])
+        self._posicao += 1
+        return frame is not None, frame
+
+    def release(self):
+        self._arquivos = []
+
+
+def criar_fonte(especificacao, tempo_real=True, repetir=True):
+    """
+    Cria a fonte de frames a partir de uma especificação:
+      - número ("0", "1"...): dispositivo de câmera (cv2.VideoCapture)
+      - pasta: imagens gravadas
+      - qualquer outro caminho: arquivo de vídeo
+    """
+    especificacao = str(especificacao)
+    if especificacao.isdigit():
+        return cv2.VideoCapture(int(especificacao))
+    if os.path.isdir(especificacao):
+        return FonteDiretorio(especificacao, tempo_real=tempo_real, repetir=repetir)
+    return FonteVideo(especificacao, tempo_real=tempo_real, repetir=repetir)
@@ -0,0 +1,99 @@
+import threading
+import numpy as np
+from servicos.banco_dados import obter_conexao
+from servicos.indice_hamming import IndiceMultiHash
+
+# A partir deste tamanho a busca por raio usa o índice multi-hash. No raio
+# usado pela tela de ponto (limiar 15 + margem 3 = 18), o bench_indice_hamming
+# mediu MIH 16 bits x linear em 314 x 258 µs com 5k, 524 x 547 µs com 10k e
+# 542 x 1197 µs com 20k: o índice só compensa a partir de ~10k.
+MIN_FUNCIONARIOS_INDICE = 10000
+
+_lock_galerias = threading.Lock()
+_galerias = {}
+
+
+def obter_galeria(db_path):
+    """
+    Galeria do banco compartilhada pelo processo: carregada na primeira
+    chamada e de novo só depois de invalidar_galeria().
+    """
+    with _lock_galerias:
+        galeria = _galerias.get(db_path)
+        if galeria is None:
+            galeria = _galerias[db_path] = GaleriaHashes.carregar(db_path)
+        return galeria
+
+
+def invalidar_galeria(db_path):
+    """Descarta a galeria carregada (chamar após alterar hashes, fotos ou funcionários ativos)."""
+    with _lock_galerias:
+        _galerias.pop(db_path, None)
+
+
+class GaleriaHashes:
+    """
+    Galeria em memória dos pHashes dos funcionários.
+    Os hashes de 8 bytes ficam numa matriz uint8 contígua (N, 8) com um
+    array paralelo de funcionario_id, para comparar um rosto com todos
+    os funcionários numa única operação vetorizada (XOR + popcount).
+    """
+
+    def __init__(self, ids, hashes, min_funcionarios_indice=MIN_FUNCIONARIOS_INDICE):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.hashes = np.ascontiguousarray(hashes, dtype=np.uint8).reshape((-1, 8))
+        self.indice = None
+        if len(self.ids) >= min_funcionarios_indice:
+            self.indice = IndiceMultiHash(self.hashes)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def carregar(cls, db_path):
+        """Carrega os hashes válidos dos funcionários ativos."""
+        ids = []
+        hashes = []
+        cursor = obter_conexao(db_path).execute(
+            "SELECT funcionario_id, embedding FROM funcionarios WHERE ativo = 1 AND length(embedding) = 8"
+        )
+        for func_id, embedding in cursor:
+            ids.append(func_id)
+            hashes.append(embedding)
+
+        # Os BLOBs de 8 bytes viram a matriz (N, 8) sem decodificação
+        return cls(ids, np.frombuffer(b"".join(hashes), dtype=np.uint8))
+
+    def distancias(self, hash_probe):
+        """Distância de Hamming entre o hash informado e todos os hashes da galeria."""
+        probe = np.asarray(hash_probe, dtype=np.uint8).reshape((1, 8))
+        return np.bitwise_count(np.bitwise_xor(self.hashes, probe)).sum(axis=1, dtype=np.int32)
+
+    def comparar(self, hash_probe, raio=None):
+        """
+        Retorna ((funcionario_id, diff), (funcionario_id, diff)) com o melhor
+        e o segundo melhor resultado. Cada posição é None se não houver
+        funcionários suficientes na galeria.
+
+        Com `raio` informado e o índice construído, só são considerados os
+        funcionários a no máximo `raio` bits, sem percorrer a galeria toda.
+        """
+        if raio is not None and self.indice is not None:
+            posicoes, diffs = self.indice.buscar_raio(hash_probe, raio)
+            resultados = [(int(self.ids[p]), int(d)) for p, d in zip(posicoes[:2], diffs[:2])]
+            resultados += [None] * (2 - len(resultados))
+            return resultados[0], resultados[1]
+
+        if len(self) == 0:
+            return None, None
+
+        diffs = self.distancias(hash_probe)
+        if len(diffs) == 1:
+            return (int(self.ids[0]), int(diffs[0])), None
+
+        # argpartition evita ordenar a galeria inteira
+        melhor, segundo = np.argpartition(diffs, 1)[:2]
+        return (
+            (int(self.ids[melhor]), int(diffs[melhor])),
+            (int(self.ids[segundo]), int(diffs[segundo])),
+        )
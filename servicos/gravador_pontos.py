@@ -0,0 +1,198 @@
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from servicos.banco_dados import DB_PATH, fechar_conexao, obter_conexao
+
+CAMINHO_JOURNAL = "ponto_journal.jsonl"
+# Máximo de batidas por grupo (um fsync do journal e um commit no SQLite)
+TAMANHO_GRUPO = 64
+# Quanto o escritor espera por mais batidas antes de fechar o grupo (s)
+ESPERA_GRUPO = 0.01
+
+_lock_gravador = threading.Lock()
+_gravador_pontos = None
+
+SQL_INSERIR_PONTO = """
+    INSERT OR IGNORE INTO ponto_final (data_ponto, funcionario_vinculo_id, sincronizado, chave)
+    VALUES (?, ?, 0, ?)
+"""
+
+
+def obter_gravador_pontos():
+    """Gravador de batidas compartilhado (iniciado na primeira chamada)."""
+    global _gravador_pontos
+    with _lock_gravador:
+        if _gravador_pontos is None:
+            _gravador_pontos = GravadorPontos()
+            _gravador_pontos.iniciar()
+        return _gravador_pontos
+
+
+class GravadorPontos:
+    """
+    Grava as batidas de ponto fora da thread da câmera.
+
+    registrar() só enfileira e devolve um Future. A thread escritora junta
+    as batidas que chegam juntas num grupo, anexa o grupo ao journal
+    (JSON lines) com um único fsync e então resolve os Futures: a partir
+    daí a batida sobrevive a uma queda e a tela pode confirmar. Em seguida
+    o grupo vai para o SQLite com um executemany e um commit.
+
+    Cada batida tem uma `chave` única (índice UNIQUE em ponto_final), então
+    reaplicar o journal é idempotente. O journal é esvaziado quando a fila
+    fica ociosa e um checkpoint do WAL confirma que tudo está no arquivo do
+    banco; na inicialização, o que restou nele é reaplicado.
+    """
+
+    def __init__(self, db_path=DB_PATH, caminho_journal=CAMINHO_JOURNAL,
+                 tamanho_grupo=TAMANHO_GRUPO, espera_grupo=ESPERA_GRUPO):
+        self.db_path = db_path
+        self.caminho_journal = caminho_journal
+        self.tamanho_grupo = tamanho_grupo
+        self.espera_grupo = espera_grupo
+
+        self._fila = queue.Queue()
+        self._thread = None
+        self._journal = None
+        self._journal_pendente = False  # há linhas no journal ainda não confirmadas por checkpoint
+        self._nao_gravados = []  # batidas no journal cujo INSERT falhou; nova tentativa no próximo grupo
+
+    def iniciar(self):
+        """Reaplica o journal de uma execução anterior e inicia a thread escritora."""
+        if self._thread is not None:
+            return
+        recuperadas = self.recuperar_journal()
+        if recuperadas:
+            print(f"[INFO] {recuperadas} batidas recuperadas do journal.")
+        self._journal = open(self.caminho_journal, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._loop_escrita, daemon=True)
+        self._thread.start()
+
+    def registrar(self, funcionario_id, data_ponto=None):
+        """
+        Enfileira uma batida. O Future retornado é resolvido com a chave da
+        batida quando ela estiver no journal em disco (ou com a exceção).
+        """
+        registro = {
+            "chave": uuid.uuid4().hex,
+            "data_ponto": data_ponto or time.strftime("%Y-%m-%d %H:%M:%S"),
+            "funcionario_id": funcionario_id,
+        }
+        futuro = Future()
+        self._fila.put((registro, futuro))
+        return futuro
+
+    def encerrar(self, timeout=5.0):
+        """Grava o que estiver na fila e para a thread escritora."""
+        if self._thread is None:
+            return
+        self._fila.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+        self._journal.close()
+
+    def recuperar_journal(self):
+        """Reaplica no SQLite as batidas do journal. Retorna quantas estavam lá."""
+        if not os.path.exists(self.caminho_journal):
+            return 0
+        registros = []
+        with open(self.caminho_journal, encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    registros.append(json.loads(linha))
+                except json.JSONDecodeError:
+                    # Última linha incompleta (queda durante a escrita): nunca foi confirmada
+                    continue
+        if registros:
+            self._inserir(registros)
+        if self._checkpoint_completo():
+            os.truncate(self.caminho_journal, 0)
+        else:
+            # Mantém só as linhas válidas, para os próximos grupos não colarem numa linha incompleta
+            temporario = self.caminho_journal + ".tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                f.write("".join(json.dumps(r) + "\n" for r in registros))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporario, self.caminho_journal)
+            self._journal_pendente = bool(registros)
+        return len(registros)
+
+    def _loop_escrita(self):
+        encerrar = False
+        while not encerrar:
+            try:
+                item = self._fila.get(timeout=1.0)
+            except queue.Empty:
+                self._limpar_journal()
+                continue
+
+            grupo = []
+            while item is not None:
+                grupo.append(item)
+                if len(grupo) >= self.tamanho_grupo:
+                    break
+                try:
+                    item = self._fila.get(timeout=self.espera_grupo)
+                except queue.Empty:
+                    break
+            encerrar = item is None
+
+            if grupo:
+                self._gravar_grupo(grupo)
+            if self._fila.empty():
+                self._limpar_journal()
+        fechar_conexao(self.db_path)
+
+    def _gravar_grupo(self, grupo):
+        registros = [registro for registro, _ in grupo]
+        try:
+            self._journal.write("".join(json.dumps(r) + "\n" for r in registros))
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+        except OSError as e:
+            for _, futuro in grupo:
+                futuro.set_exception(e)
+            return
+
+        # Durável no journal: libera a confirmação na tela antes do SQLite
+        self._journal_pendente = True
+        for registro, futuro in grupo:
+            futuro.set_result(registro["chave"])
+
+        pendentes = self._nao_gravados + registros
+        try:
+            self._inserir(pendentes)
+            self._nao_gravados = []
+        except Exception as e:
+            # Continua no journal; reaplicado no próximo grupo ou na inicialização
+            print(f"[ERROR] Falha ao gravar {len(pendentes)} batidas no banco: {e}")
+            self._nao_gravados = pendentes
+
+    def _inserir(self, registros):
+        conn = obter_conexao(self.db_path)
+        with conn:
+            conn.executemany(
+                SQL_INSERIR_PONTO,
+                [(r["data_ponto"], r["funcionario_id"], r["chave"]) for r in registros],
+            )
+
+    def _checkpoint_completo(self):
+        """Copia o WAL para o banco; True se todas as páginas foram transferidas."""
+        ocupado, paginas_log, paginas_copiadas = obter_conexao(self.db_path).execute(
+            "PRAGMA wal_checkpoint(PASSIVE)"
+        ).fetchone()
+        return not ocupado and paginas_log == paginas_copiadas
+
+    def _limpar_journal(self):
+        if not self._journal_pendente or self._nao_gravados:
+            return
+        # Com synchronous=NORMAL o commit não faz fsync; só após o checkpoint
+        # as batidas estão garantidas no banco e podem sair do journal
+        if self._checkpoint_completo():
+            self._journal.truncate(0)
+            self._journal_pendente = False
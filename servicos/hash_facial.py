@@ -0,0 +1,17 @@
+import cv2
+
+
+def gerar_phash(bgr_image):
+    """
+    pHash do recorte do rosto, com a iluminação equalizada.
+    Necessita opencv-contrib-python para cv2.img_hash.
+    """
+    gray = cv2.cvtColor(bgr_image, cv2.COLOR_BGR2GRAY) if bgr_image.ndim == 3 else bgr_image
+    gray = cv2.equalizeHist(gray)
+    hasher = cv2.img_hash.PHash_create()
+    return hasher.compute(gray)  # shape (1, 8)
+
+
+def gerar_hash_facial(bgr_image):
+    """pHash do rosto em 8 bytes, no formato gravado em funcionarios.embedding."""
+    return gerar_phash(bgr_image).flatten().tobytes()
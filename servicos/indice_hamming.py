@@ -0,0 +1,95 @@
+import numpy as np
+
+
+class IndiceMultiHash:
+    """
+    Índice multi-index hashing (MIH) sobre os pHashes de 64 bits.
+
+    Cada hash é dividido em m substrings de `bits_substring` bits e cada
+    substring vira uma tabela de buckets. Se dois hashes estão a no máximo
+    `raio` bits de distância, pelo princípio da casa dos pombos pelo menos
+    uma das substrings difere em no máximo raio // m bits. Basta então
+    visitar, em cada tabela, os buckets vizinhos da substring consultada e
+    conferir a distância completa apenas desses candidatos.
+    """
+
+    def __init__(self, hashes, bits_substring=16):
+        if bits_substring not in (8, 16):
+            raise ValueError("bits_substring deve ser 8 ou 16.")
+
+        self.hashes = np.ascontiguousarray(hashes, dtype=np.uint8).reshape((-1, 8))
+        self.bits_substring = bits_substring
+        self.num_substrings = 64 // bits_substring
+        self._mascaras_por_raio = {}
+
+        # Tabelas em formato CSR: as posições de cada tabela ordenadas pelo
+        # valor da substring, concatenadas em `_ordens`, e para cada valor
+        # possível o início do seu bucket dentro de `_ordens`.
+        tamanho_tabela = 1 << bits_substring
+        substrings = self._substrings(self.hashes)
+        ordens = []
+        self._offsets = []
+        for j in range(self.num_substrings):
+            coluna = substrings[:, j]
+            ordens.append(np.argsort(coluna, kind="stable"))
+            offsets = np.zeros(tamanho_tabela + 1, dtype=np.int64)
+            np.cumsum(np.bincount(coluna, minlength=tamanho_tabela), out=offsets[1:])
+            self._offsets.append(offsets + j * len(self.hashes))
+        self._ordens = np.concatenate(ordens) if ordens else np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def _substrings(self, hashes):
+        if self.bits_substring == 16:
+            return hashes.view(">u2").astype(np.int64)
+        return hashes.astype(np.int64)
+
+    def _mascaras(self, raio_substring):
+        """Todas as máscaras XOR com no máximo `raio_substring` bits ligados."""
+        mascaras = self._mascaras_por_raio.get(raio_substring)
+        if mascaras is None:
+            valores = np.arange(1 << self.bits_substring, dtype=np.int64)
+            mascaras = valores[np.bitwise_count(valores) <= raio_substring]
+            self._mascaras_por_raio[raio_substring] = mascaras
+        return mascaras
+
+    def candidatos(self, hash_probe, raio):
+        """Posições na galeria que podem estar a no máximo `raio` bits do hash."""
+        probe = np.asarray(hash_probe, dtype=np.uint8).reshape((1, 8))
+        substrings_probe = self._substrings(probe)[0]
+        mascaras = self._mascaras(raio // self.num_substrings)
+
+        inicios = []
+        tamanhos = []
+        for j, offsets in enumerate(self._offsets):
+            valores = substrings_probe[j] ^ mascaras
+            inicio = offsets[valores]
+            tamanho = offsets[valores + 1] - inicio
+            nao_vazios = tamanho > 0
+            inicios.append(inicio[nao_vazios])
+            tamanhos.append(tamanho[nao_vazios])
+
+        inicios = np.concatenate(inicios)
+        tamanhos = np.concatenate(tamanhos)
+        total = int(tamanhos.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # Expande os intervalos [inicio, inicio + tamanho) sem laço Python
+        deslocamentos = np.repeat(inicios - (np.cumsum(tamanhos) - tamanhos), tamanhos)
+        posicoes = np.arange(total, dtype=np.int64) + deslocamentos
+        return np.unique(self._ordens[posicoes])
+
+    def buscar_raio(self, hash_probe, raio):
+        """
+        Retorna (posicoes, diffs) de todos os hashes a no máximo `raio` bits,
+        ordenados pela distância.
+        """
+        probe = np.asarray(hash_probe, dtype=np.uint8).reshape((1, 8))
+        candidatos = self.candidatos(probe, raio)
+        diffs = np.bitwise_count(np.bitwise_xor(self.hashes[candidatos], probe)).sum(axis=1, dtype=np.int32)
+        dentro = diffs <= raio
+        candidatos, diffs = candidatos[dentro], diffs[dentro]
+        ordem = np.argsort(diffs, kind="stable")
+        return candidatos[ordem], diffs[ordem]
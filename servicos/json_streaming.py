@@ -0,0 +1,121 @@
+import json
+from itertools import islice
+
+# Itens de funcionários por transação na ingestão em fluxo (cada um traz a foto)
+TAMANHO_LOTE_INGESTAO = 200
+
+_decodificador = json.JSONDecoder()
+_ESPACOS = " \t\n\r"
+
+
+class _Leitor:
+    """Buffer sobre os pedaços de texto; só guarda o que ainda não foi decodificado."""
+
+    def __init__(self, pedacos):
+        self._pedacos = iter(pedacos)
+        self.buffer = ""
+        self.pos = 0
+        self.fim = False
+
+    def ler_mais(self, minimo=1):
+        """Acrescenta pedaços até ter `minimo` caracteres novos (ou o fluxo acabar)."""
+        restante = self.buffer[self.pos:]
+        novos = []
+        lidos = 0
+        while lidos < minimo:
+            pedaco = next(self._pedacos, None)
+            if pedaco is None:
+                self.fim = True
+                break
+            novos.append(pedaco)
+            lidos += len(pedaco)
+        self.buffer = restante + "".join(novos)
+        self.pos = 0
+        return lidos > 0
+
+    def proximo_caractere(self):
+        """Pula espaços e retorna o próximo caractere sem consumi-lo ('' no fim do fluxo)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _ESPACOS:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.ler_mais():
+                return ""
+
+    def consumir(self, esperado):
+        if self.proximo_caractere() != esperado:
+            raise ValueError(f"JSON inválido: esperado {esperado!r} na posição {self.pos}")
+        self.pos += 1
+
+    def decodificar(self):
+        """
+        Decodifica o próximo valor com raw_decode. Se o valor estiver cortado
+        no fim do buffer, lê mais (no mínimo o tamanho do buffer, para o custo
+        das novas tentativas não crescer com o tamanho do item) e tenta de novo.
+        """
+        self.proximo_caractere()
+        while True:
+            try:
+                valor, fim = _decodificador.raw_decode(self.buffer, self.pos)
+                # Um número no fim do buffer pode continuar no próximo pedaço
+                if fim < len(self.buffer) or self.fim:
+                    self.pos = fim
+                    return valor
+            except json.JSONDecodeError:
+                if self.fim:
+                    raise
+            self.ler_mais(max(len(self.buffer) - self.pos, 1))
+
+
+def iterar_itens_json(pedacos, chave="data", extras=None):
+    """
+    Gera um a um os itens da lista `chave` de um documento JSON recebido em
+    pedaços de texto (ex.: response.iter_text()), sem montar o documento
+    inteiro na memória. Aceita também um documento que é a própria lista.
+    As outras chaves do objeto, se houver, vão para o dict `extras` (as que
+    vêm depois da lista só estão lá quando a iteração termina).
+    """
+    leitor = _Leitor(pedacos)
+    inicio = leitor.proximo_caractere()
+    if inicio == "[":
+        yield from _iterar_lista(leitor)
+        return
+    leitor.consumir("{")
+    encontrou = False
+    while leitor.proximo_caractere() != "}":
+        if leitor.proximo_caractere() == ",":
+            leitor.pos += 1
+        nome = leitor.decodificar()
+        leitor.consumir(":")
+        if nome == chave and not encontrou and leitor.proximo_caractere() == "[":
+            encontrou = True
+            yield from _iterar_lista(leitor)
+        else:
+            valor = leitor.decodificar()
+            if extras is not None:
+                extras[nome] = valor
+    if not encontrou:
+        raise ValueError(f"Lista '{chave}' não encontrada no JSON.")
+
+
+def _iterar_lista(leitor):
+    leitor.consumir("[")
+    if leitor.proximo_caractere() == "]":
+        leitor.pos += 1
+        return
+    while True:
+        yield leitor.decodificar()
+        separador = leitor.proximo_caractere()
+        leitor.pos += 1
+        if separador == "]":
+            return
+        if separador != ",":
+            raise ValueError(f"JSON inválido: esperado ',' ou ']' e veio {separador!r}")
+
+
+def iterar_lotes(itens, tamanho=TAMANHO_LOTE_INGESTAO):
+    """Agrupa um iterável em listas de até `tamanho` itens."""
+    itens = iter(itens)
+    while lote := list(islice(itens, tamanho)):
+        yield lote
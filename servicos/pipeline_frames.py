@@ -0,0 +1,148 @@
+import base64
+import threading
+import time
+from collections import deque
+import cv2
+
+
+class FilaRecente:
+    """
+    Fila limitada que descarta o item mais antigo quando cheia. Com
+    tamanho 1, o consumidor sempre recebe o frame mais novo e um estágio
+    lento nunca acumula atraso sobre os demais.
+    """
+
+    def __init__(self, tamanho=1):
+        self._itens = deque(maxlen=tamanho)
+        self._condicao = threading.Condition()
+        self._fechada = False
+        self.descartados = 0
+
+    def colocar(self, item):
+        with self._condicao:
+            if len(self._itens) == self._itens.maxlen:
+                self.descartados += 1
+            self._itens.append(item)
+            self._condicao.notify()
+
+    def obter(self, timeout=0.5):
+        """Retorna o item mais antigo ainda na fila, ou None (timeout/fila fechada)."""
+        with self._condicao:
+            self._condicao.wait_for(lambda: self._itens or self._fechada, timeout)
+            if not self._itens:
+                return None
+            return self._itens.popleft()
+
+    def fechar(self):
+        with self._condicao:
+            self._fechada = True
+            self._condicao.notify_all()
+
+
+def desenhar_retangulo(frame, rosto):
+    x, y, w, h = rosto
+    cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+
+
+class PipelineReconhecimento:
+    """
+    Pipeline em estágios, cada um na sua thread:
+        captura -> detecção -> reconhecimento (hash/match)
+                \\-> preview (desenho + JPEG + base64)
+
+    Os estágios se comunicam por FilaRecente, então o reconhecimento
+    trabalha sempre sobre o frame mais novo e o preview roda na sua
+    própria taxa (`fps_preview`), independente da taxa de reconhecimento.
+
+    - detectar(frame) -> lista de rostos (x, y, w, h)
+    - reconhecer(frame, rosto) -> resultado repassado a ao_resultado
+    - ao_resultado(resultado) é chamado a cada frame detectado, com None
+      quando não há rosto (útil para timeouts)
+    - ao_preview(frame_base64) recebe o JPEG em base64 para exibição
+    """
+
+    def __init__(self, assinatura, detectar, reconhecer, ao_resultado, ao_preview,
+                 fps_preview=15, desenhar=desenhar_retangulo):
+        self.assinatura = assinatura
+        self.detectar = detectar
+        self.reconhecer = reconhecer
+        self.ao_resultado = ao_resultado
+        self.ao_preview = ao_preview
+        self.intervalo_preview = 1.0 / fps_preview
+        self.desenhar = desenhar
+
+        self._fila_deteccao = FilaRecente()
+        self._fila_reconhecimento = FilaRecente()
+        self._fila_preview = FilaRecente()
+        self._ultimo_rosto = None
+        self._parar = threading.Event()
+        self._threads = []
+
+    def iniciar(self):
+        for estagio in (self._captura, self._deteccao, self._reconhecimento, self._preview):
+            thread = threading.Thread(target=self._executar, args=(estagio,), daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def parar(self):
+        """Sinaliza a parada. Pode ser chamado de dentro dos callbacks."""
+        self._parar.set()
+        for fila in (self._fila_deteccao, self._fila_reconhecimento, self._fila_preview):
+            fila.fechar()
+
+    def aguardar(self):
+        """Bloqueia até o pipeline parar e todas as threads terminarem."""
+        self._parar.wait()
+        atual = threading.current_thread()
+        for thread in self._threads:
+            if thread is not atual:
+                thread.join()
+
+    def _executar(self, estagio):
+        try:
+            while not self._parar.is_set():
+                estagio()
+        except Exception as e:
+            print(f"[ERROR] Falha no pipeline de frames: {e}")
+            self.parar()
+
+    def _captura(self):
+        frame = self.assinatura.proximo_frame(timeout=0.5)
+        if frame is not None:
+            self._fila_deteccao.colocar(frame)
+            self._fila_preview.colocar(frame)
+
+    def _deteccao(self):
+        frame = self._fila_deteccao.obter()
+        if frame is None:
+            return
+        rostos = self.detectar(frame)
+        rosto = tuple(int(v) for v in rostos[0]) if len(rostos) > 0 else None
+        self._ultimo_rosto = rosto
+        self._fila_reconhecimento.colocar((frame, rosto))
+
+    def _reconhecimento(self):
+        item = self._fila_reconhecimento.obter()
+        if item is None:
+            return
+        frame, rosto = item
+        resultado = self.reconhecer(frame, rosto) if rosto is not None else None
+        if not self._parar.is_set():
+            self.ao_resultado(resultado)
+
+    def _preview(self):
+        inicio = time.monotonic()
+        frame = self._fila_preview.obter()
+        if frame is None:
+            return
+        rosto = self._ultimo_rosto
+        if rosto is not None and self.desenhar is not None:
+            # O mesmo frame pode estar na detecção: desenha numa cópia
+            frame = frame.copy()
+            self.desenhar(frame, rosto)
+        _, buffer = cv2.imencode(".jpg", frame)
+        if not self._parar.is_set():
+            self.ao_preview(base64.b64encode(buffer).decode("utf-8"))
+        restante = self.intervalo_preview - (time.monotonic() - inicio)
+        if restante > 0:
+            self._parar.wait(restante)
@@ -0,0 +1,252 @@
+import base64
+import binascii
+import datetime
+import os
+import sqlite3
+from functools import lru_cache
+import httpx
+from servicos.avatares import invalidar_avatares
+from servicos.banco_dados import DB_PATH, consultar, consultar_um, transacao
+from servicos.cliente_api import obter_cliente_api
+from servicos.galeria_hashes import invalidar_galeria
+from servicos.json_streaming import iterar_itens_json, iterar_lotes
+
+DEFAULT_IMAGE_PATH = "assets/default_image.jpg"
+
+# Sincronização incremental de funcionários e vínculos de uma entidade.
+#
+# Protocolo com a API (endpoints funcionarios e funcionarios-vinculos):
+#   - a requisição leva entidade_id e, se já houver cursor gravado para a
+#     entidade, atualizado_desde=<cursor>;
+#   - a resposta é {"data": [...], "removidos": [ids], "cursor": "..."}; em
+#     "data" vêm só os registros alterados desde o cursor (um item com
+#     "ativo": false também desativa o funcionário);
+#   - resposta sem "cursor" (servidor sem suporte a delta ou primeira carga)
+#     é tratada como a lista completa: quem não veio é desativado.
+# Só funcionários com origem_api = 1 são atualizados ou desativados; os
+# cadastrados no terminal (origem_api = 0) nunca são tocados, e um id da
+# API que colide com um deles é ignorado (com aviso no log).
+# O cursor só avança depois que a resposta inteira foi gravada, então uma
+# sincronização interrompida é refeita a partir do cursor anterior.
+RECURSO_FUNCIONARIOS = "funcionarios"
+RECURSO_VINCULOS = "funcionarios-vinculos"
+
+# Só reescreve a linha (e a foto) se algo mudou; foto nova volta o hash para pendente
+SQL_UPSERT_FUNCIONARIO = """
+    INSERT INTO funcionarios (funcionario_id, nome, matricula, entidade_id, cpf, embedding, foto_blob, ativo, origem_api)
+    VALUES (?, ?, ?, ?, ?, NULL, ?, 1, 1)
+    ON CONFLICT (funcionario_id) DO UPDATE SET
+        nome = excluded.nome,
+        matricula = excluded.matricula,
+        entidade_id = excluded.entidade_id,
+        cpf = excluded.cpf,
+        embedding = CASE WHEN funcionarios.foto_blob IS excluded.foto_blob THEN funcionarios.embedding END,
+        foto_blob = excluded.foto_blob,
+        ativo = 1
+    WHERE funcionarios.origem_api = 1 AND (
+          funcionarios.nome IS NOT excluded.nome
+       OR funcionarios.matricula IS NOT excluded.matricula
+       OR funcionarios.entidade_id IS NOT excluded.entidade_id
+       OR funcionarios.cpf IS NOT excluded.cpf
+       OR funcionarios.foto_blob IS NOT excluded.foto_blob
+       OR funcionarios.ativo = 0)
+"""
+
+SQL_DESATIVAR_FUNCIONARIO = "UPDATE funcionarios SET ativo = 0 WHERE funcionario_id = ? AND ativo = 1 AND origem_api = 1"
+
+SQL_UPSERT_VINCULO = """
+    INSERT INTO funcionarios_vinculos (id, matricula, status, funcionario_id)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        matricula = excluded.matricula,
+        status = excluded.status,
+        funcionario_id = excluded.funcionario_id
+"""
+
+
+@lru_cache(maxsize=1)
+def carregar_imagem_padrao():
+    """Foto usada quando a da API não é base64 válido."""
+    if os.path.exists(DEFAULT_IMAGE_PATH):
+        with open(DEFAULT_IMAGE_PATH, "rb") as f:
+            return f.read()
+    return b""
+
+
+def ler_cursor(entidade_id, recurso, db_path=DB_PATH):
+    linha = consultar_um(
+        "SELECT cursor FROM sincronizacao_funcionarios WHERE entidade_id = ? AND recurso = ?",
+        (entidade_id, recurso),
+        db_path=db_path,
+    )
+    return linha[0] if linha else None
+
+
+def gravar_cursor(conn, entidade_id, recurso, cursor):
+    agora = datetime.datetime.now().isoformat(sep=" ", timespec="seconds")
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO sincronizacao_funcionarios (entidade_id, recurso, cursor, atualizado_em)
+        VALUES (?, ?, ?, ?)
+        """,
+        (entidade_id, recurso, str(cursor), agora),
+    )
+
+
+def _parametros(entidade_id, cursor):
+    params = {"entidade_id": entidade_id}
+    if cursor is not None:
+        params["atualizado_desde"] = cursor
+    return params
+
+
+def aplicar_vinculos(db_path, entidade_id, documento, delta):
+    """
+    Grava os vínculos recebidos (upsert em lote), apaga os removidos e
+    atualiza a matrícula dos funcionários cujo vínculo mudou. Retorna
+    quantos vínculos vieram.
+    """
+    linhas = {}
+    for vinculo in documento.get("data") or []:
+        vinculo_id = vinculo.get("id", 0)
+        linhas[vinculo_id] = (
+            vinculo_id,
+            vinculo.get("matricula", "0000"),
+            vinculo.get("status", "Desconhecido"),
+            vinculo.get("funcionario_id", 0),
+        )
+    removidos = (documento.get("removidos") or []) if delta else []
+
+    with transacao(db_path) as conn:
+        conn.executemany(SQL_UPSERT_VINCULO, linhas.values())
+        conn.executemany("DELETE FROM funcionarios_vinculos WHERE id = ?", [(i,) for i in removidos])
+        conn.executemany(
+            "UPDATE funcionarios SET matricula = ? WHERE funcionario_id = ? AND origem_api = 1 AND matricula IS NOT ?",
+            [(matricula, funcionario_id, matricula) for _, matricula, _, funcionario_id in linhas.values()],
+        )
+        if documento.get("cursor") is not None:
+            gravar_cursor(conn, entidade_id, RECURSO_VINCULOS, documento["cursor"])
+    return len(linhas)
+
+
+def gravar_lote_funcionarios(db_path, entidade_id, itens, matriculas, existentes, locais=frozenset()):
+    """
+    Upsert de um lote de funcionários numa transação; os que vierem com
+    "ativo": false são desativados. `existentes` (ids já no banco) separa
+    inseridos de atualizados sem um SELECT por linha e é atualizado aqui;
+    ids em `locais` (cadastrados no terminal) são ignorados.
+    Retorna (contagem, [(nome, matricula, cpf)] dos gravados, ids recebidos).
+    """
+    linhas = []
+    inativos = []
+    for funcionario in itens:
+        funcionario_id = funcionario.get("id", 0)
+        if funcionario_id in locais:
+            print(f"[AVISO] Funcionário {funcionario_id} da API tem o id de um cadastro local. Ignorado.")
+            continue
+        if funcionario.get("ativo", True) is False:
+            inativos.append((funcionario_id,))
+            continue
+        try:
+            foto_blob = base64.b64decode(funcionario.get("foto_base64") or "")
+        except (binascii.Error, TypeError):
+            foto_blob = carregar_imagem_padrao()
+        linhas.append((
+            funcionario_id,
+            funcionario.get("nome", "Desconhecido"),
+            matriculas.get(funcionario_id, "0000"),
+            entidade_id,
+            funcionario.get("numero_cpf", "00000000000"),
+            foto_blob,
+        ))
+
+    with transacao(db_path) as conn:
+        alteradas = conn.executemany(SQL_UPSERT_FUNCIONARIO, linhas).rowcount
+        desativados = conn.executemany(SQL_DESATIVAR_FUNCIONARIO, inativos).rowcount
+
+    inseridos = sum(1 for linha in linhas if linha[0] not in existentes)
+    existentes.update(linha[0] for linha in linhas)
+    contagem = {"inseridos": inseridos, "atualizados": alteradas - inseridos, "desativados": desativados}
+    gravados = [(nome, matricula, cpf) for _, nome, matricula, _, cpf, _ in linhas]
+    recebidos = {linha[0] for linha in linhas} | {i for (i,) in inativos}
+    return contagem, gravados, recebidos
+
+
+def desativar_funcionarios(db_path, ids):
+    with transacao(db_path) as conn:
+        return conn.executemany(SQL_DESATIVAR_FUNCIONARIO, [(i,) for i in ids]).rowcount
+
+
+def sincronizar_funcionarios(entidade_id, db_path=DB_PATH, completo=False, ao_lote=None, cliente=None):
+    """
+    Sincroniza vínculos e funcionários da entidade. Sem `completo`, pede só
+    as alterações desde o último cursor. Os vínculos são baixados enquanto
+    os funcionários já chegam em fluxo; estes são gravados em lotes
+    (ao_lote recebe a lista (nome, matricula, cpf) de cada lote gravado).
+    Retorna {"inseridos", "atualizados", "desativados", "vinculos"}, ou
+    None se os funcionários não puderam ser baixados.
+    """
+    cliente = cliente or obter_cliente_api()
+    cursor_funcionarios = None if completo else ler_cursor(entidade_id, RECURSO_FUNCIONARIOS, db_path)
+    cursor_vinculos = None if completo else ler_cursor(entidade_id, RECURSO_VINCULOS, db_path)
+    fluxo = cliente.transmitir_texto(RECURSO_FUNCIONARIOS, _parametros(entidade_id, cursor_funcionarios))
+
+    contagem = {"inseridos": 0, "atualizados": 0, "desativados": 0, "vinculos": 0}
+    try:
+        # Vínculos primeiro: trazem as matrículas dos funcionários
+        try:
+            response = cliente.buscar(RECURSO_VINCULOS, _parametros(entidade_id, cursor_vinculos))
+            response.raise_for_status()
+            documento = response.json()
+            delta = cursor_vinculos is not None and documento.get("cursor") is not None
+            contagem["vinculos"] = aplicar_vinculos(db_path, entidade_id, documento, delta)
+        except (httpx.HTTPError, ValueError, AttributeError, sqlite3.Error) as e:
+            print(f"[ERROR] Erro ao sincronizar vínculos da entidade {entidade_id}: {e!r}")
+
+        # Ids e matrículas lidos uma vez, em vez de um SELECT por funcionário
+        matriculas = dict(consultar("SELECT funcionario_id, matricula FROM funcionarios_vinculos ORDER BY id", db_path=db_path))
+        existentes = {i for (i,) in consultar("SELECT funcionario_id FROM funcionarios", db_path=db_path)}
+        locais = {i for (i,) in consultar("SELECT funcionario_id FROM funcionarios WHERE origem_api = 0", db_path=db_path)}
+        ativos_entidade = {
+            i for (i,) in consultar(
+                "SELECT funcionario_id FROM funcionarios WHERE entidade_id = ? AND ativo = 1 AND origem_api = 1",
+                (entidade_id,),
+                db_path=db_path,
+            )
+        }
+
+        extras = {}
+        recebidos = set()
+        for lote in iterar_lotes(iterar_itens_json(fluxo, extras=extras)):
+            parcial, gravados, ids = gravar_lote_funcionarios(db_path, entidade_id, lote, matriculas, existentes, locais)
+            for chave, valor in parcial.items():
+                contagem[chave] += valor
+            recebidos |= ids
+            if ao_lote:
+                ao_lote(gravados)
+    except (httpx.HTTPError, ValueError, sqlite3.Error) as e:
+        print(f"[ERROR] Erro ao sincronizar funcionários da entidade {entidade_id}: {e!r}")
+        return None
+    finally:
+        fluxo.fechar()
+
+    delta = cursor_funcionarios is not None and extras.get("cursor") is not None
+    if delta:
+        removidos = extras.get("removidos") or []
+    elif recebidos:
+        # Lista completa: quem veio da API e não veio agora saiu da entidade
+        # (lista vazia não desativa ninguém)
+        removidos = ativos_entidade - recebidos
+    else:
+        removidos = []
+    contagem["desativados"] += desativar_funcionarios(db_path, removidos)
+
+    if extras.get("cursor") is not None:
+        with transacao(db_path) as conn:
+            gravar_cursor(conn, entidade_id, RECURSO_FUNCIONARIOS, extras["cursor"])
+
+    if contagem["atualizados"] or contagem["desativados"]:
+        # Fotos podem ter mudado (e foto nova volta o hash para pendente)
+        invalidar_avatares()
+        invalidar_galeria(db_path)
+    return contagem
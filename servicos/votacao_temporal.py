@@ -0,0 +1,93 @@
+import time
+from collections import Counter, deque
+from statistics import median
+
+ACEITO = "aceito"
+ABORTADO = "abortado"
+
+
+class AcumuladorVotos:
+    """
+    Votação temporal sobre os resultados de vários frames.
+
+    Cada frame contribui com o melhor candidato da galeria, a distância
+    dele e a margem para o segundo colocado. Um frame é um "acerto" do
+    candidato quando a distância está dentro do `limiar` e a margem é de
+    pelo menos `margem_minima` bits. O candidato é aceito assim que soma
+    `hits_necessarios` acertos dentro da janela deslizante de `janela`
+    frames, e mais acertos que qualquer outro candidato na mesma janela.
+
+    Os resultados devem vir de GaleriaHashes.comparar sem raio ou com
+    raio=`raio_busca` (limiar + margem_minima): assim um segundo colocado
+    fora do raio já garante a margem, e a decisão é a mesma pela busca
+    linear ou pelo índice, independente do número de funcionários.
+
+    Se passarem `segundos_instavel` sem um acerto estável (mesmo candidato
+    em dois frames seguidos), seja por falta de rosto ou por candidato
+    oscilando, a tentativa é abortada em vez de esperar o tempo total.
+    O prazo é em tempo, não em frames, para não depender do fps da câmera.
+    """
+
+    def __init__(self, limiar=15, janela=8, hits_necessarios=3, margem_minima=3, segundos_instavel=3.0):
+        self.limiar = limiar
+        self.hits_necessarios = hits_necessarios
+        self.margem_minima = margem_minima
+        self.segundos_instavel = segundos_instavel
+        self.raio_busca = limiar + margem_minima
+
+        self._frames = deque(maxlen=janela)
+        self._diffs_por_candidato = {}
+        self._candidato_anterior = None
+        self._ultimo_estavel = None
+        self.melhor_diff = None
+
+    def adicionar(self, resultado, agora=None):
+        """
+        Registra o resultado de um frame: None (sem rosto) ou
+        (melhor, segundo), como devolvido por GaleriaHashes.comparar.
+        `agora` (s, monotônico) permite reproduzir gravações no tempo delas.
+        Retorna (ACEITO, funcionario_id), (ABORTADO, motivo) ou None.
+        """
+        agora = time.monotonic() if agora is None else agora
+        if self._ultimo_estavel is None:
+            # O prazo conta a partir do primeiro frame
+            self._ultimo_estavel = agora
+        melhor, segundo = resultado if resultado is not None else (None, None)
+
+        if melhor is None:
+            self._frames.append(None)
+            self._candidato_anterior = None
+        else:
+            func_id, diff = melhor
+            if segundo is not None:
+                margem = segundo[1] - diff
+            else:
+                # Sem segundo colocado dentro do raio: ele está a mais de `raio_busca` bits
+                margem = self.raio_busca + 1 - diff
+
+            if self.melhor_diff is None or diff < self.melhor_diff:
+                self.melhor_diff = diff
+            self._diffs_por_candidato.setdefault(func_id, []).append(diff)
+
+            acerto = diff <= self.limiar and margem >= self.margem_minima
+            self._frames.append(func_id if acerto else None)
+
+            if acerto and func_id == self._candidato_anterior:
+                self._ultimo_estavel = agora
+            self._candidato_anterior = func_id if acerto else None
+
+        acertos = Counter(f for f in self._frames if f is not None).most_common(2)
+        if acertos:
+            candidato, hits = acertos[0]
+            hits_segundo = acertos[1][1] if len(acertos) > 1 else 0
+            if hits >= self.hits_necessarios and hits > hits_segundo:
+                return ACEITO, candidato
+
+        if agora - self._ultimo_estavel >= self.segundos_instavel:
+            return ABORTADO, "Nenhum rosto estável na frente da câmera."
+        return None
+
+    def mediana_diff(self, funcionario_id):
+        """Mediana das distâncias observadas para o candidato, ou None."""
+        diffs = self._diffs_por_candidato.get(funcionario_id)
+        return median(diffs) if diffs else None
@@ -0,0 +1,39 @@
+import flet as ft
+
+# Distância (px) do fim da lista que dispara o carregamento da próxima página
+MARGEM_CARREGAR_PAGINA = 300
+
+
+class PaginacaoRolagem:
+    """
+    Carrega a próxima página de uma ListView quando a rolagem chega a
+    `margem` px do fim. tem_proxima() diz se ainda há página; carregar()
+    busca a próxima (na própria thread ou em outra) e deve chamar
+    concluir() ao terminar, com ou sem erro. Enquanto isso, novos eventos
+    de rolagem não disparam outro carregamento.
+    Listas que descartam páginas do topo informam tem_anterior() e
+    carregar_anterior(), chamados quando a rolagem chega perto do início.
+    """
+
+    def __init__(self, lista: ft.ListView, tem_proxima, carregar, margem=MARGEM_CARREGAR_PAGINA,
+                 tem_anterior=None, carregar_anterior=None):
+        self.tem_proxima = tem_proxima
+        self.carregar = carregar
+        self.tem_anterior = tem_anterior
+        self.carregar_anterior = carregar_anterior
+        self.margem = margem
+        self.carregando = False
+        lista.on_scroll = self.ao_rolar
+
+    def ao_rolar(self, e):
+        if self.carregando:
+            return
+        if e.max_scroll_extent - e.pixels <= self.margem and self.tem_proxima():
+            self.carregando = True
+            self.carregar()
+        elif e.pixels <= self.margem and self.tem_anterior is not None and self.tem_anterior():
+            self.carregando = True
+            self.carregar_anterior()
+
+    def concluir(self):
+        self.carregando = False
@@ -1,9 +1,8 @@
 import flet as ft
-import sqlite3
 import datetime
+from servicos.banco_dados import consultar_um
 
-def criar_tela_administracao(page, db_connection):
-    db_connection = sqlite3.connect("banco_de_dados.db")
+def criar_tela_administracao(page, db_path):
     # Função para voltar à tela principal
     def voltar(e):
         page.go("/")
@@ -37,15 +36,15 @@ def criar_tela_administracao(page, db_connection):
 
     # Recuperar entidade configurada
     def obter_entidade_configurada():
-        cursor = db_connection.cursor()
-        cursor.execute("SELECT estado_nome, cidade_nome, name, codigo_igbe FROM entidades_configuradas LIMIT 1")
-        entidade = cursor.fetchone()
+        entidade = consultar_um(
+            "SELECT estado_nome, cidade_nome, name, codigo_igbe FROM entidades_configuradas LIMIT 1",
+            db_path=db_path,
+        )
         if entidade:
             return entidade[0], entidade[1], entidade[2], entidade[3]
         return "", "", "", ""
 
     entidade_nome, cidade_nome, estado_nome, codigo_igbe = obter_entidade_configurada()
-    db_connection.close()  # Feche a conexão ao final do uso
     # Obter o mês atual
     mes_atual = datetime.datetime.now().strftime("%b/%Y").upper()
 
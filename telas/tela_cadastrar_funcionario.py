@@ -1,5 +1,4 @@
 import os
-import sqlite3
 import cv2
 import base64
 import time
@@ -8,8 +7,11 @@ import json
 import numpy as np
 from threading import Thread
 import flet as ft
-
-DB_PATH = "banco_de_dados.db"
+from servicos.camera import obter_servico_camera
+from servicos.deteccao_faces import criar_detector_tela
+from servicos.hash_facial import gerar_hash_facial
+from servicos.banco_dados import DB_PATH, executar
+from servicos.galeria_hashes import invalidar_galeria
 
 def validar_cpf_formatado(cpf):
     return re.match(r"^\d{3}\.\d{3}\.\d{3}-\d{2}$", cpf) is not None
@@ -37,22 +39,22 @@ def criar_tela_cadastrar_funcionario(page: ft.Page):
     def capturar_rosto():
         nonlocal rosto_capturado, hash_gerado
 
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
+        assinatura = obter_servico_camera().assinar()
+        if not assinatura.aguardar_camera():
+            assinatura.cancelar()
             emitir_alerta("Erro", "Não foi possível acessar a câmera.")
             return
 
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+        detector = criar_detector_tela("cadastrar_funcionario")
         start_time = time.time()
         capture_duration = 10  # 10 segundos para capturar
 
         while time.time() - start_time < capture_duration:
-            ret, frame = cap.read()
-            if not ret:
+            frame = assinatura.proximo_frame()
+            if frame is None:
                 continue
 
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray, 1.1, 5, minSize=(100, 100))
+            faces = detector.detectar(frame)
 
             if len(faces) > 0:
                 (x, y, w, h) = faces[0]
@@ -68,7 +70,7 @@ def criar_tela_cadastrar_funcionario(page: ft.Page):
             camera_feed.src_base64 = base64.b64encode(buffer).decode("utf-8")
             page.update()
 
-        cap.release()
+        assinatura.cancelar()
 
         if rosto_capturado is not None:
             hash_gerado = gerar_hash_facial(rosto_capturado)
@@ -77,20 +79,6 @@ def criar_tela_cadastrar_funcionario(page: ft.Page):
 
         verificar_campos()
 
-    def gerar_hash_facial(bgr_image):
-        """
-        Gera um hash pHash para a imagem do rosto.
-        Necessita opencv-contrib-python para cv2.img_hash.
-        """
-        gray = cv2.cvtColor(bgr_image, cv2.COLOR_BGR2GRAY)
-        # Equaliza a iluminação para ajudar na consistência
-        gray = cv2.equalizeHist(gray)
-
-        hasher = cv2.img_hash.PHash_create()
-        hash_val = hasher.compute(gray)  # shape: (1, 8)
-        hash_hex = hash_val.flatten().tobytes().hex()
-        return hash_hex
-
     def verificar_campos():
         salvar_btn.disabled = not (
             nome_input.value.strip()
@@ -124,28 +112,26 @@ def criar_tela_cadastrar_funcionario(page: ft.Page):
 
             with open(path_arquivo, "rb") as f:
                 foto_bin = f.read()
-            foto_base64 = base64.b64encode(foto_bin).decode("utf-8")
 
             # Salva no banco
-            with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-                c = conn.cursor()
-                c.execute(
-                    """
-                    INSERT INTO funcionarios (
-                        nome, matricula, entidade_id, cpf, embedding, foto_base64, foto_blob
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        nome_input.value.strip(),
-                        int(matricula_input.value.strip()),
-                        int(entidade_input.value.strip()),
-                        cpf_somente_numeros,
-                        hash_gerado,
-                        foto_base64,
-                        foto_bin,
-                    ),
-                )
-                conn.commit()
+            executar(
+                """
+                INSERT INTO funcionarios (
+                    nome, matricula, entidade_id, cpf, embedding, foto_blob
+                ) VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    nome_input.value.strip(),
+                    int(matricula_input.value.strip()),
+                    int(entidade_input.value.strip()),
+                    cpf_somente_numeros,
+                    hash_gerado,
+                    foto_bin,
+                ),
+                db_path=DB_PATH,
+            )
+            # O novo funcionário já é reconhecido na próxima batida
+            invalidar_galeria(DB_PATH)
 
             emitir_alerta("Sucesso", "Funcionário cadastrado com sucesso!")
             limpar_campos()
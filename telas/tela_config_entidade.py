@@ -1,78 +1,63 @@
-import sqlite3
 import flet as ft
 import os
-
-def criar_tabela_configuracao(db_path):
-    """Cria a tabela de entidades configuradas se não existir."""
-    tabela = """
-        CREATE TABLE IF NOT EXISTS entidades_configuradas (
-            id INTEGER PRIMARY KEY NOT NULL,
-            entidade_id INTEGER NOT NULL,
-            estado_nome VARCHAR(200) NOT NULL,
-            cidade_nome VARCHAR(200) NOT NULL,
-            codigo_igbe VARCHAR(200) NOT NULL,
-            name VARCHAR(200) NOT NULL
-        );
-    """
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute(tabela)
-    conn.commit()
-    conn.close()
+from servicos.banco_dados import consultar, transacao
 
 def carregar_opcoes(db_path, tabela):
     """Carrega as opções de estado, cidade ou entidade do banco de dados."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute(f"SELECT id, nome FROM {tabela}")
-    opcoes = cursor.fetchall()
-    conn.close()
-    return opcoes
+    return consultar(f"SELECT id, nome FROM {tabela}", db_path=db_path)
+
+def carregar_cidades_estado(db_path, estado_id):
+    """
+    Carrega os municípios de um estado, ordenados por nome. Se o estado não
+    tiver nenhum (estado_id ainda NULL depois da migração 3, ou API que não
+    manda estado_id), carrega todos os municípios.
+    Retorna (linhas, True se a lista é só do estado).
+    """
+    linhas = consultar(
+        "SELECT id, nome FROM cidades WHERE estado_id = ? ORDER BY nome",
+        (estado_id,),
+        db_path=db_path,
+    )
+    if linhas:
+        return linhas, True
+    return consultar("SELECT id, nome FROM cidades ORDER BY nome", db_path=db_path), False
 
 def carregar_entidades(db_path):
     """Carrega todas as entidades disponíveis no banco de dados."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
     query = """
         SELECT id, entidade_id, nome FROM entidades
     """
-    cursor.execute(query)
-    entidades = cursor.fetchall()
-    conn.close()
-    return entidades
+    return consultar(query, db_path=db_path)
 
 def salvar_configuracao(db_path, entidade_id, estado_nome, cidade_nome, codigo_igbe, entidade_nome):
     """Salva a configuração selecionada na tabela de entidades configuradas."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM entidades_configuradas")  # Remove a configuração anterior
-
-    # Insere a nova configuração
-    cursor.execute(
-        """
-        INSERT INTO entidades_configuradas (entidade_id, estado_nome, cidade_nome, codigo_igbe, name)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (
-            entidade_id,  # Salva o entidade_id da tabela entidades
-            estado_nome,
-            cidade_nome,
-            codigo_igbe,
-            entidade_nome,  # Nome da entidade
-        ),
-    )
-    conn.commit()
-    conn.close()
+    with transacao(db_path) as conn:
+        conn.execute("DELETE FROM entidades_configuradas")  # Remove a configuração anterior
+
+        # Insere a nova configuração
+        conn.execute(
+            """
+            INSERT INTO entidades_configuradas (entidade_id, estado_nome, cidade_nome, codigo_igbe, name)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (
+                entidade_id,  # Salva o entidade_id da tabela entidades
+                estado_nome,
+                cidade_nome,
+                codigo_igbe,
+                entidade_nome,  # Nome da entidade
+            ),
+        )
 
 def criar_tela_config_entidade(page: ft.Page, db_path: str):
     if not os.path.exists(db_path):
         raise ValueError(f"Banco de dados não encontrado no caminho: {db_path}")
 
-    criar_tabela_configuracao(db_path)
-
     estados = carregar_opcoes(db_path, "estados")
     cidades = []
     entidades = []
+    # Municípios e opções do dropdown já montadas, por estado
+    cidades_por_estado = {}
 
     estado_dropdown = ft.Dropdown(
         label="Selecione o Estado",
@@ -111,10 +96,15 @@ def criar_tela_config_entidade(page: ft.Page, db_path: str):
         estado_id = estado_dropdown.value
         if not estado_id:
             return
-        cidades = carregar_opcoes(db_path, "cidades")
-        cidade_dropdown.options = [
-            ft.dropdown.Option(str(cidade[0]), cidade[1]) for cidade in cidades
-        ]
+        if estado_id in cidades_por_estado:
+            cidades, cidade_dropdown.options = cidades_por_estado[estado_id]
+        else:
+            cidades, do_estado = carregar_cidades_estado(db_path, int(estado_id))
+            cidade_dropdown.options = [ft.dropdown.Option(str(cidade[0]), cidade[1]) for cidade in cidades]
+            # Lista de fallback ou vazia não vai para o cache: a sincronização pode preencher estado_id depois
+            if do_estado:
+                cidades_por_estado[estado_id] = (cidades, cidade_dropdown.options)
+        cidade_dropdown.value = None
         page.update()
 
     def carregar_entidades_opcoes():
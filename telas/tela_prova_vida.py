@@ -6,6 +6,9 @@ import sqlite3
 import os
 import time
 import cv2
+from servicos.camera import obter_servico_camera
+from servicos.deteccao_faces import criar_detector_tela
+from servicos.banco_dados import executar
 
 def criar_tela_prova_vida(page: ft.Page, db_path: str):
     """
@@ -26,9 +29,10 @@ def criar_tela_prova_vida(page: ft.Page, db_path: str):
         """Captura frames da câmera e detecta rostos usando OpenCV."""
         nonlocal stop_camera, rosto_capturado
 
-        cap = cv2.VideoCapture(0)
+        assinatura = obter_servico_camera().assinar()
 
-        if not cap.isOpened():
+        if not assinatura.aguardar_camera():
+            assinatura.cancelar()
             status_text.value = "Erro: Não foi possível acessar a câmera."
             status_text.color = ft.Colors.RED
             page.update()
@@ -38,16 +42,16 @@ def criar_tela_prova_vida(page: ft.Page, db_path: str):
         status_text.color = ft.Colors.GREEN
         page.update()
 
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+        detector = criar_detector_tela("prova_vida")
 
         while not stop_camera:
-            ret, frame = cap.read()
-            if ret:
+            frame = assinatura.proximo_frame()
+            if frame is not None:
                 # Converter frame para escala de cinza
                 gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
 
                 # Detectar rostos
-                faces = face_cascade.detectMultiScale(gray_frame, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+                faces = detector.detectar(gray_frame)
 
                 for (x, y, w, h) in faces:
                     # Capturar o rosto detectado
@@ -64,7 +68,7 @@ def criar_tela_prova_vida(page: ft.Page, db_path: str):
 
             time.sleep(0.03)
 
-        cap.release()
+        assinatura.cancelar()
 
     def cadastrar_facial():
         """Cadastra o funcionário no banco de dados."""
@@ -81,16 +85,10 @@ def criar_tela_prova_vida(page: ft.Page, db_path: str):
             rosto_hash = hashlib.sha256(rosto_capturado.tobytes()).hexdigest()
 
             # Inserir no banco de dados
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-
-            cursor.execute("""
+            executar("""
                 INSERT INTO dados_faciais (nome, matricula, hash_encoding)
                 VALUES (?, ?, ?)
-            """, (nome_input.value, matricula_input.value, rosto_hash))
-
-            conn.commit()
-            conn.close()
+            """, (nome_input.value, matricula_input.value, rosto_hash), db_path=db_path)
 
             emitir_alerta("Sucesso", "Cadastro realizado com sucesso!")
             limpar_campos()
@@ -1,13 +1,16 @@
 import flet as ft
-import base64
 from threading import Thread
 import time
-import sqlite3
 import os
-import cv2
-import numpy as np
-
-DB_PATH = "banco_de_dados.db"
+from servicos.galeria_hashes import obter_galeria
+from servicos.avatares import obter_avatar_base64
+from servicos.camera import obter_servico_camera
+from servicos.pipeline_frames import PipelineReconhecimento
+from servicos.deteccao_faces import criar_detector_tela
+from servicos.hash_facial import gerar_phash
+from servicos.votacao_temporal import AcumuladorVotos, ACEITO, ABORTADO
+from servicos.banco_dados import consultar_um
+from servicos.gravador_pontos import obter_gravador_pontos
 
 def criar_tela_registro_ponto(page: ft.Page, db_path: str):
     if not os.path.exists(db_path):
@@ -37,12 +40,12 @@ def criar_tela_registro_ponto(page: ft.Page, db_path: str):
         page.dialog.open = True
         page.update()
 
-    def exibir_confirmacao(foto_blob, nome, matricula):
+    def exibir_confirmacao(funcionario_id, nome, matricula):
         """
         Diálogo de sucesso menor com layout:
           - Ícone de check centralizado em cima
           - Texto "REGISTRO REALIZADO"
-          - Exibe foto_blob ou imagem padrão caso foto_blob não exista
+          - Exibe a foto do funcionário ou imagem padrão caso não exista
           - Nome e Matrícula
         Fecha sozinho após 3s e volta para "/".
         """
@@ -52,19 +55,8 @@ def criar_tela_registro_ponto(page: ft.Page, db_path: str):
             page.go("/")
             page.update()
 
-        # Determina qual imagem usar
-        if foto_blob:
-            foto_bytes = foto_blob
-        else:
-            default_path = "assets/default_image.jpg"
-            if os.path.exists(default_path):
-                with open(default_path, "rb") as f:
-                    foto_bytes = f.read()
-            else:
-                foto_bytes = b""  # Sem nada
-
-        # Converter foto em base64
-        foto_base64 = base64.b64encode(foto_bytes).decode("utf-8")
+        # Foto carregada sob demanda (com cache) apenas para o funcionário reconhecido
+        foto_base64 = obter_avatar_base64(db_path, funcionario_id)
         foto_url = f"data:image/jpeg;base64,{foto_base64}"
 
         # Layout do diálogo
@@ -126,141 +118,95 @@ def criar_tela_registro_ponto(page: ft.Page, db_path: str):
 
         Thread(target=fechar_dialog_automatico, daemon=True).start()
 
-    def registrar_ponto(conn, funcionario_id, nome, matricula, foto_blob):
-        """Registra no DB e exibe a confirmação usando a foto do BD."""
-        try:
-            data_ponto = time.strftime("%Y-%m-%d %H:%M:%S")
-            conn.execute(
-                """
-                INSERT INTO ponto_final (data_ponto, funcionario_vinculo_id, sincronizado)
-                VALUES (?, ?, ?)
-                """,
-                (data_ponto, funcionario_id, 0),
-            )
-            conn.commit()
-            exibir_confirmacao(foto_blob, nome, matricula)
-        except Exception as e:
-            emitir_alerta("Erro", f"Erro ao registrar ponto: {e}")
-
-    # =============== pHash Lógica ====================
-
-    def gerar_phash(bgr_image):
-        gray = cv2.cvtColor(bgr_image, cv2.COLOR_BGR2GRAY)
-        gray = cv2.equalizeHist(gray)
-        hasher = cv2.img_hash.PHash_create()
-        return hasher.compute(gray)  # shape (1,8)
-
-    def distance_hash(hash1, hash2):
-        b1 = hash1.tobytes()
-        b2 = hash2.tobytes()
-        diff_bits = 0
-        for bb1, bb2 in zip(b1, b2):
-            xor_val = bb1 ^ bb2
-            diff_bits += bin(xor_val).count("1")
-        return diff_bits
+    def registrar_ponto(funcionario_id, nome, matricula):
+        """
+        Envia a batida ao gravador e exibe a confirmação (com a foto do BD)
+        assim que ela estiver gravada no journal, sem bloquear o reconhecimento.
+        """
+        def ao_gravar(futuro):
+            erro = futuro.exception()
+            if erro is not None:
+                emitir_alerta("Erro", f"Erro ao registrar ponto: {erro}")
+            else:
+                exibir_confirmacao(funcionario_id, nome, matricula)
 
-    # =================================================
+        obter_gravador_pontos().registrar(funcionario_id).add_done_callback(ao_gravar)
 
     def update_images():
-        nonlocal stop_camera, identificacao_realizada
+        nonlocal stop_camera
 
         try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
+            # Galeria do processo: só volta ao banco depois que os hashes mudam
+            galeria = obter_galeria(db_path)
         except Exception as e:
             emitir_alerta("Erro", f"Falha ao conectar ao banco: {e}")
             return
 
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
+        assinatura = obter_servico_camera().assinar()
+        if not assinatura.aguardar_camera():
+            assinatura.cancelar()
             emitir_alerta("Erro", "Não foi possível acessar a câmera.")
             return
 
         start_time = time.time()
         capture_duration = 5
 
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
-
-        melhor_diff_global = None
-        melhor_funcionario = None
-
-        while not stop_camera:
-            ret, frame = cap.read()
-            if not ret:
-                continue
+        detector = criar_detector_tela("registro_ponto")
 
-            gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(
-                gray_frame,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(100, 100),
-            )
-
-            if len(faces) > 0:
-                x, y, w, h = faces[0]
-                rosto_capturado = frame[y:y+h, x:x+w]
-
-                hash_atual = gerar_phash(rosto_capturado)
-
-                cursor.execute("SELECT funcionario_id, nome, matricula, embedding, foto_blob FROM funcionarios")
-                funcionarios = cursor.fetchall()
-
-                for (func_id, nome, matricula, embedding_hex, foto_blob) in funcionarios:
-                    if not embedding_hex:
-                        continue
-                    try:
-                        stored_bytes = bytes.fromhex(embedding_hex)
-                        stored_hash = np.frombuffer(stored_bytes, dtype=np.uint8).reshape((1, 8))
-
-                        diff = distance_hash(hash_atual, stored_hash)
-                        print(f"[DEBUG] {nome} (id={func_id}), diff={diff}")
-
-                        if melhor_diff_global is None or diff < melhor_diff_global:
-                            melhor_diff_global = diff
-                            melhor_funcionario = (func_id, nome, matricula, foto_blob)
-                    except ValueError:
-                        continue
+        votacao = AcumuladorVotos(limiar=PHASH_THRESHOLD)
 
-                # Desenha retângulo
-                cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
+        def reconhecer(frame, rosto):
+            x, y, w, h = rosto
+            hash_atual = gerar_phash(frame[y:y+h, x:x+w])
+            return galeria.comparar(hash_atual, raio=votacao.raio_busca)
 
-            # Atualiza feed
-            _, buffer = cv2.imencode(".jpg", frame)
-            frame_base64 = base64.b64encode(buffer).decode("utf-8")
+        def ao_preview(frame_base64):
             camera_feed.src_base64 = frame_base64
-
-            elapsed_time = time.time() - start_time
-            remaining_time = max(0, 5 - int(elapsed_time))
+            remaining_time = max(0, capture_duration - int(time.time() - start_time))
             timer_text.value = f"{remaining_time} segundos restantes"
-
             page.update()
 
-            # Lógica de verificação
-            if melhor_diff_global is not None and melhor_diff_global <= PHASH_THRESHOLD:
-                if not identificacao_realizada:
-                    identificacao_realizada = True
-                    (func_id, nome, mat, foto_blob) = melhor_funcionario
-                    registrar_ponto(conn, func_id, nome, mat, foto_blob)
-                    stop_camera = True  # Para sair do loop
-
-            if elapsed_time >= capture_duration and not identificacao_realizada:
-                # terminou o tempo e não identificou
-                if melhor_funcionario is not None:
-                    (f_id, f_nome, f_mat, f_foto_blob) = melhor_funcionario
+        def ao_resultado(resultado):
+            """Executado na thread de reconhecimento, uma vez por frame processado."""
+            nonlocal stop_camera, identificacao_realizada
+
+            decisao = votacao.adicionar(resultado)
+            elapsed_time = time.time() - start_time
+
+            # Lógica de verificação: aceita com votos consistentes em vários frames
+            if decisao is not None and decisao[0] == ACEITO and not identificacao_realizada:
+                identificacao_realizada = True
+                funcionario_id = decisao[1]
+                nome, mat = consultar_um(
+                    "SELECT nome, matricula FROM funcionarios WHERE funcionario_id = ?",
+                    (funcionario_id,),
+                    db_path=db_path,
+                )
+                registrar_ponto(funcionario_id, nome, mat)
+                stop_camera = True  # Para sair do loop
+
+            elif not identificacao_realizada and (
+                elapsed_time >= capture_duration or (decisao is not None and decisao[0] == ABORTADO)
+            ):
+                # terminou o tempo (ou nenhum rosto estável) e não identificou
+                if votacao.melhor_diff is not None:
                     emitir_alerta(
                         "Alerta",
-                        f"Funcionário não reconhecido (diff={melhor_diff_global}). "
+                        f"Funcionário não reconhecido (diff={votacao.melhor_diff}). "
                         "Tente novamente ou contate o RH."
                     )
                 else:
                     emitir_alerta("Alerta", "Nenhum rosto reconhecido. Tente novamente ou contate o RH.")
                 stop_camera = True
 
-            time.sleep(0.03)
+            if stop_camera:
+                pipeline.parar()
+
+        pipeline = PipelineReconhecimento(assinatura, detector.detectar, reconhecer, ao_resultado, ao_preview)
+        pipeline.iniciar()
+        pipeline.aguardar()
 
-        cap.release()
-        conn.close()
+        assinatura.cancelar()
 
     # Inicia a câmera automaticamente
     stop_camera = False
@@ -1,7 +1,18 @@
 import flet as ft
-import sqlite3
 import requests
 import os
+from collections import deque
+from servicos.banco_dados import consultar, consultar_um
+from servicos.envio_batidas import enviar_batidas_em_segundo_plano
+from telas.paginacao_lista import PaginacaoRolagem
+
+TAMANHO_PAGINA_BATIDAS = 50
+# Páginas mantidas na lista; além disso, a página mais distante da rolagem
+# é descartada (e consultada de novo se o usuário voltar até ela)
+MAX_PAGINAS_CARREGADAS = 4
+# Altura fixa (px) de cada linha: com item_extent, descartar ou inserir uma
+# página acima da vista desloca a rolagem numa distância conhecida
+ALTURA_LINHA_BATIDA = 80
 
 
 def verificar_conexao_internet():
@@ -17,65 +28,166 @@ def criar_tela_sincronizar_batidas(page: ft.Page, db_path: str):
     if not os.path.exists(db_path):
         raise ValueError(f"Banco de dados não encontrado no caminho: {db_path}")
 
-    registros = []
-    selecionados = set()
+    selecionados = set()  # ids de ponto_final, independente das páginas carregadas
+    checkboxes = {}  # id -> Checkbox das linhas já carregadas
     selecionar_varios = True
+    proxima_pagina = None  # (data_ponto, id) do último registro carregado, se houver mais depois
+    pagina_anterior = None  # (data_ponto, id) do primeiro registro carregado, se houver páginas descartadas antes
+    paginas = deque()  # [(id, data_ponto)] de cada página na lista, em ordem
 
     # Contador de itens selecionados
     contador_selecionados = ft.Text("0 itens selecionados", size=16, color=ft.Colors.BLUE)
+    total_pendentes = ft.Text("", size=14, color="#666666")
 
-    # Elementos da lista de registros
-    batidas_list = ft.ListView(expand=True, spacing=10, padding=10, auto_scroll=True)
+    # Elementos da lista de registros (sem auto_scroll: rolar até o fim carregaria todas as páginas)
+    batidas_list = ft.ListView(
+        expand=True, item_extent=ALTURA_LINHA_BATIDA, padding=10, auto_scroll=False, on_scroll_interval=100
+    )
 
-    def carregar_registros():
-        """Carrega registros do banco de dados."""
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            """
+    def criar_linha(registro_id, data_hora, nome, matricula):
+        checkbox = ft.Checkbox(
+            value=registro_id in selecionados,
+            on_change=lambda e, reg_id=registro_id: alternar_selecao(reg_id, e.control.value),
+        )
+        checkboxes[registro_id] = checkbox
+        return ft.Row(
+            controls=[
+                checkbox,
+                ft.Column(
+                    controls=[
+                        ft.Text(f"{nome if nome else 'Funcionário Desconhecido'}", size=16, weight="bold"),
+                        ft.Text(f"Matrícula: {matricula if matricula else 'N/A'}"),
+                        ft.Text(f"Data e Hora: {data_hora}"),
+                    ],
+                    spacing=2,
+                ),
+            ],
+            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+        )
+
+    def consultar_pagina(apos=None, antes=None):
+        """
+        Página de batidas pendentes depois de `apos` (ou antes de `antes`),
+        em ordem (data_ponto, id). Retorna (registros, se há mais naquela direção).
+        """
+        if antes:
+            condicao, ordem, chave = "AND (p.data_ponto, p.id) < (?, ?)", "DESC", antes
+        else:
+            condicao, ordem, chave = ("AND (p.data_ponto, p.id) > (?, ?)" if apos else ""), "", apos
+        resultado = consultar(
+            f"""
             SELECT p.id, p.data_ponto, f.nome, f.matricula
             FROM ponto_final p
             LEFT JOIN funcionarios f ON p.funcionario_vinculo_id = f.funcionario_id
-            WHERE p.sincronizado = 0
-            """
+            WHERE p.sincronizado = 0 {condicao}
+            ORDER BY p.data_ponto {ordem}, p.id {ordem}
+            LIMIT ?
+            """,
+            (*(chave or ()), TAMANHO_PAGINA_BATIDAS + 1),
+            db_path=db_path,
         )
-        resultado = cursor.fetchall()
-        conn.close()
+        pagina = resultado[:TAMANHO_PAGINA_BATIDAS]
+        if antes:
+            pagina.reverse()
+        return pagina, len(resultado) > TAMANHO_PAGINA_BATIDAS
+
+    def descartar_pagina(primeira):
+        """Tira da lista a primeira ou a última página carregada; retorna quantas linhas saíram."""
+        registros = paginas.popleft() if primeira else paginas.pop()
+        for registro_id, _ in registros:
+            checkboxes.pop(registro_id, None)
+        if primeira:
+            del batidas_list.controls[:len(registros)]
+        else:
+            del batidas_list.controls[-len(registros):]
+        return len(registros)
+
+    def carregar_pagina():
+        """
+        Carrega a próxima página de batidas pendentes, por (data_ponto, id),
+        descartando a primeira se passar de MAX_PAGINAS_CARREGADAS.
+        Retorna (registros carregados, linhas descartadas do topo).
+        """
+        nonlocal proxima_pagina, pagina_anterior
+        pagina, mais = consultar_pagina(apos=proxima_pagina)
+        if pagina:
+            paginas.append([(reg[0], reg[1]) for reg in pagina])
+            batidas_list.controls.extend(criar_linha(*reg) for reg in pagina)
+        proxima_pagina = (pagina[-1][1], pagina[-1][0]) if mais else None
+
+        descartadas = 0
+        if len(paginas) > MAX_PAGINAS_CARREGADAS:
+            descartadas = descartar_pagina(primeira=True)
+            registro_id, data_ponto = paginas[0][0]
+            pagina_anterior = (data_ponto, registro_id)
+        return pagina, descartadas
+
+    def carregar_pagina_anterior():
+        """
+        Recarrega a página antes da primeira da lista, descartando a última
+        se passar de MAX_PAGINAS_CARREGADAS. Retorna quantas linhas entraram no topo.
+        """
+        nonlocal proxima_pagina, pagina_anterior
+        pagina, mais = consultar_pagina(antes=pagina_anterior)
+        pagina_anterior = (pagina[0][1], pagina[0][0]) if pagina and mais else None
+        if not pagina:
+            return 0
+        paginas.appendleft([(reg[0], reg[1]) for reg in pagina])
+        batidas_list.controls[0:0] = [criar_linha(*reg) for reg in pagina]
+
+        if len(paginas) > MAX_PAGINAS_CARREGADAS:
+            descartar_pagina(primeira=False)
+            registro_id, data_ponto = paginas[-1][-1]
+            proxima_pagina = (data_ponto, registro_id)
+        return len(pagina)
 
-        registros.clear()
+    def carregar_registros():
+        """Recarrega a lista a partir da primeira página e o total de pendentes."""
+        nonlocal proxima_pagina, pagina_anterior
         batidas_list.controls.clear()
+        checkboxes.clear()
         selecionados.clear()
+        paginas.clear()
+        proxima_pagina = None
+        pagina_anterior = None
 
-        if resultado:
-            for reg in resultado:
-                registros.append(reg)
-                registro_id, data_hora, nome, matricula = reg
-
-                # Criação da linha formatada
-                batidas_list.controls.append(
-                    ft.Row(
-                        controls=[
-                            ft.Checkbox(
-                                value=False,
-                                on_change=lambda e, reg_id=registro_id: alternar_selecao(reg_id, e.control.value),
-                            ),
-                            ft.Column(
-                                controls=[
-                                    ft.Text(f"{nome if nome else 'Funcionário Desconhecido'}", size=16, weight="bold"),
-                                    ft.Text(f"Matrícula: {matricula if matricula else 'N/A'}"),
-                                    ft.Text(f"Data e Hora: {data_hora}"),
-                                ],
-                                spacing=2,
-                            ),
-                        ],
-                        alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
-                    ),
-                )
-            contador_selecionados.value = "0 itens selecionados"
-        else:
+        # COUNT coberto pelo índice idx_ponto_final_sincronizado_data
+        pendentes = consultar_um("SELECT COUNT(*) FROM ponto_final WHERE sincronizado = 0", db_path=db_path)[0]
+        total_pendentes.value = f"{pendentes} batidas pendentes"
+
+        if not carregar_pagina()[0]:
             batidas_list.controls.append(ft.Text("Nenhum registro encontrado.", size=16, color=ft.Colors.RED))
+        contador_selecionados.value = "0 itens selecionados"
+        page.update()
 
+    def carregar_proxima_pagina():
+        descartadas = 0
+        try:
+            _, descartadas = carregar_pagina()
+        finally:
+            paginacao.concluir()
+        page.update()
+        if descartadas:
+            # Linhas saíram acima da vista: mantém na tela os mesmos registros
+            batidas_list.scroll_to(delta=-descartadas * ALTURA_LINHA_BATIDA, duration=0)
+
+    def carregar_pagina_anterior_na_lista():
+        inseridas = 0
+        try:
+            inseridas = carregar_pagina_anterior()
+        finally:
+            paginacao.concluir()
         page.update()
+        if inseridas:
+            batidas_list.scroll_to(delta=inseridas * ALTURA_LINHA_BATIDA, duration=0)
+
+    paginacao = PaginacaoRolagem(
+        batidas_list,
+        lambda: proxima_pagina is not None,
+        carregar_proxima_pagina,
+        tem_anterior=lambda: pagina_anterior is not None,
+        carregar_anterior=carregar_pagina_anterior_na_lista,
+    )
 
     def alternar_selecao(registro_id, selecionado):
         """Alterna a seleção de um registro."""
@@ -92,19 +204,20 @@ def criar_tela_sincronizar_batidas(page: ft.Page, db_path: str):
         nonlocal selecionar_varios
 
         if selecionar_varios:
-            # Seleciona até 50 registros
-            for idx, reg in enumerate(registros):
-                if idx >= 50:
-                    break
-                selecionados.add(reg[0])
-
+            # Seleciona as 50 batidas pendentes mais antigas, carregadas ou não
+            selecionados.update(
+                registro_id for (registro_id,) in consultar(
+                    "SELECT id FROM ponto_final WHERE sincronizado = 0 ORDER BY data_ponto, id LIMIT 50",
+                    db_path=db_path,
+                )
+            )
         else:
             # Desmarca todos
             selecionados.clear()
 
-        # Atualiza os checkboxes e o estado do botão
-        for checkbox, reg in zip(batidas_list.controls, registros):
-            checkbox.controls[0].value = reg[0] in selecionados
+        # Atualiza os checkboxes das linhas carregadas e o estado do botão
+        for registro_id, checkbox in checkboxes.items():
+            checkbox.value = registro_id in selecionados
 
         selecionar_varios = not selecionar_varios
         selecionar_btn.text = "Desmarcar" if not selecionar_varios else "Selecionar Vários"
@@ -121,18 +234,33 @@ def criar_tela_sincronizar_batidas(page: ft.Page, db_path: str):
             emitir_alerta("Aviso", "Nenhum registro selecionado para sincronizar.")
             return
 
-        # Simulação de sincronização
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        for registro_id in selecionados:
-            cursor.execute("UPDATE ponto_final SET sincronizado = 1 WHERE id = ?", (registro_id,))
+        def exibir_progresso(enviadas, total):
+            total_pendentes.value = f"Enviando batidas: {enviadas}/{total}"
+            page.update()
 
-        conn.commit()
-        conn.close()
+        def concluir_envio(resultado):
+            sincronizar_btn.disabled = False
+            carregar_registros()
+            if resultado is None:
+                emitir_alerta("Erro", "Falha ao enviar as batidas. Verifique os logs.")
+            elif not resultado["pendentes"]:
+                emitir_alerta("Sucesso", "Registros sincronizados com sucesso!")
+            else:
+                emitir_alerta(
+                    "Aviso",
+                    f"{resultado['enviadas']} batidas enviadas; {resultado['pendentes']} não foram aceitas "
+                    "pelo servidor e continuam pendentes.",
+                )
 
-        emitir_alerta("Sucesso", "Registros sincronizados com sucesso!")
-        carregar_registros()
+        # O envio (lotes, novas tentativas com espera) roda fora do handler do clique
+        if not enviar_batidas_em_segundo_plano(
+            set(selecionados), db_path, ao_progresso=exibir_progresso, ao_concluir=concluir_envio
+        ):
+            emitir_alerta("Aviso", "Já há um envio de batidas em andamento.")
+            return
+        sincronizar_btn.disabled = True
+        total_pendentes.value = "Enviando batidas..."
+        page.update()
 
     def emitir_alerta(titulo, mensagem):
         """Exibe um alerta com título e mensagem."""
@@ -183,6 +311,7 @@ def criar_tela_sincronizar_batidas(page: ft.Page, db_path: str):
             ft.Column(
                 controls=[
                     ft.Text("Sincronizar Batidas", size=24, weight="bold"),
+                    total_pendentes,
                     contador_selecionados,
                     batidas_list,
                 ],
@@ -1,21 +1,21 @@
 import os
-import sqlite3
 import requests
 import flet as ft
-import base64
-
-DB_PATH = "banco_de_dados.db"
-DEFAULT_IMAGE_PATH = "assets/default_image.jpg"
-
-# Função para carregar uma imagem padrão em binário
-def carregar_imagem_padrao():
-    if os.path.exists(DEFAULT_IMAGE_PATH):
-        with open(DEFAULT_IMAGE_PATH, "rb") as f:
-            return f.read()
-    else:
-        return None
-
-DEFAULT_IMAGE_BLOB = carregar_imagem_padrao()
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from servicos.banco_dados import transacao
+from servicos.busca_funcionarios import buscar_funcionarios
+from servicos.cadastro_hashes import iniciar_cadastro_em_segundo_plano
+from servicos.sincronizacao_funcionarios import sincronizar_funcionarios
+from telas.paginacao_lista import PaginacaoRolagem
+
+# Pausa na digitação (s) antes de pesquisar
+ATRASO_PESQUISA = 0.3
+
+# Uma única thread faz todas as pesquisas e páginas, em todas as visitas à
+# tela: a conexão SQLite dela (servicos.banco_dados) é aberta uma vez só
+_executor_pesquisa = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pesquisa_funcionarios")
 
 # Função para verificar conexão com a internet
 def verificar_conexao_internet():
@@ -25,103 +25,21 @@ def verificar_conexao_internet():
     except requests.ConnectionError:
         return False
 
-# Verificar se funcionário já existe na base local
-def funcionario_existe(cursor, funcionario_id):
-    cursor.execute("SELECT COUNT(*) FROM funcionarios WHERE funcionario_id = ?", (funcionario_id,))
-    return cursor.fetchone()[0] > 0
-
-# Sincronizar dados com a API
-def sincronizar_dados_funcionarios(api_url, db_path, tabela, lista_funcionarios, entidade_id, matriculas_map):
-    try:
-        response = requests.get(api_url, timeout=10)
-        response.raise_for_status()
-        dados = response.json()["data"]
-
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-
-            if tabela == "funcionarios":
-                for funcionario in dados:
-                    funcionario_id = funcionario.get("id", 0)
-
-                    # Ignorar funcionário se já existir
-                    if funcionario_existe(cursor, funcionario_id):
-                        print(f"Funcionário {funcionario_id} já existe. Ignorado.")
-                        continue
-
-                    nome = funcionario.get("nome", "Desconhecido")
-                    cpf = funcionario.get("numero_cpf", "00000000000")
-                    foto_base64 = funcionario.get("foto_base64", "")
-                    matricula = matriculas_map.get(funcionario_id, "0000")
-
-                    try:
-                        # Tentar converter a imagem base64 ou usar a imagem padrão
-                        try:
-                            foto_blob = base64.b64decode(foto_base64)
-                        except (base64.binascii.Error, TypeError):
-                            foto_blob = DEFAULT_IMAGE_BLOB
-
-                        # Inserir no banco de dados
-                        cursor.execute(
-                            """
-                            INSERT OR REPLACE INTO funcionarios (funcionario_id, nome, matricula, entidade_id, cpf, embedding, foto_base64, foto_blob)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                            """,
-                            (
-                                funcionario_id,
-                                nome,
-                                matricula,
-                                entidade_id,
-                                cpf,
-                                "",
-                                foto_base64,
-                                foto_blob,
-                            ),
-                        )
-                        lista_funcionarios.append(
-                            ft.Container(
-                                content=ft.Column(
-                                    controls=[
-                                        ft.Text(f"Nome: {nome}", weight="bold", size=16),
-                                        ft.Text(f"Matrícula: {matricula} | CPF: {cpf}", size=14),
-                                    ],
-                                    spacing=5,
-                                ),
-                                padding=10,
-                                border=ft.border.all(1, ft.colors.GREY),
-                                border_radius=5,
-                                margin=ft.margin.symmetric(horizontal=5, vertical=5),
-                            )
-                        )
-                    except sqlite3.Error as e:
-                        print(f"Erro ao salvar funcionário {nome}: {e}")
-
-            elif tabela == "funcionarios_vinculos":
-                for vinculo in dados:
-                    funcionario_id = vinculo.get("funcionario_id", 0)
-                    matricula = vinculo.get("matricula", "0000")
-                    matriculas_map[funcionario_id] = matricula
-
-                    try:
-                        cursor.execute(
-                            """
-                            INSERT OR REPLACE INTO funcionarios_vinculos (id, matricula, status, funcionario_id)
-                            VALUES (?, ?, ?, ?)
-                            """,
-                            (
-                                vinculo.get("id", 0),
-                                matricula,
-                                vinculo.get("status", "Desconhecido"),
-                                funcionario_id,
-                            ),
-                        )
-                    except sqlite3.Error as e:
-                        print(f"Erro ao salvar vínculo {vinculo.get('id', 0)}: {e}")
-
-            conn.commit()
-
-    except requests.RequestException as e:
-        print(f"Erro ao acessar API: {e}")
+# Linha da lista de funcionários
+def criar_item_funcionario(nome, matricula, cpf):
+    return ft.Container(
+        content=ft.Column(
+            controls=[
+                ft.Text(f"Nome: {nome}", weight="bold", size=16),
+                ft.Text(f"Matrícula: {matricula} | CPF: {cpf}", size=14),
+            ],
+            spacing=5,
+        ),
+        padding=10,
+        border=ft.border.all(1, ft.colors.GREY),
+        border_radius=5,
+        margin=ft.margin.symmetric(horizontal=5, vertical=5),
+    )
 
 # Criar a tela
 def criar_tela_sincronizar_funcionarios(page: ft.Page, db_path: str):
@@ -129,7 +47,7 @@ def criar_tela_sincronizar_funcionarios(page: ft.Page, db_path: str):
         raise ValueError(f"Banco de dados não encontrado no caminho: {db_path}")
 
     status_text = ft.Text("Nenhuma ação realizada.", size=16, color=ft.Colors.RED)
-    lista_funcionarios = ft.ListView(expand=True, spacing=10)
+    lista_funcionarios = ft.ListView(expand=True, spacing=10, on_scroll_interval=100)
     loading_spinner = ft.ProgressRing(visible=False, width=50, height=50)
     pesquisa_filtro = ft.Dropdown(
         options=[
@@ -139,66 +57,83 @@ def criar_tela_sincronizar_funcionarios(page: ft.Page, db_path: str):
         ],
         value="nome",
         width=120,
+        on_change=lambda e: agendar_pesquisa(),
     )
     pesquisa_input = ft.TextField(
         label="Pesquisar",
         width=200,
-        on_change=lambda e: realizar_pesquisa(pesquisa_filtro.value, e.control.value),
+        on_change=lambda e: agendar_pesquisa(),
         hint_text="Digite para buscar...",
     )
 
 
-    def realizar_pesquisa(filtro, valor):
+    # Estado da pesquisa: cada tecla incrementa a geração e invalida as anteriores
+    geracao_pesquisa = 0
+    pesquisa_atual = ("nome", "")
+    proxima_pagina = None
+    lock_pesquisa = threading.Lock()
+
+    def agendar_pesquisa():
+        """Debounce: só pesquisa quando o usuário para de digitar por ATRASO_PESQUISA."""
+        nonlocal geracao_pesquisa
+        with lock_pesquisa:
+            geracao_pesquisa += 1
+            pesquisa = (pesquisa_filtro.value, pesquisa_input.value or "")
+            _executor_pesquisa.submit(pesquisar, geracao_pesquisa, pesquisa, time.monotonic() + ATRASO_PESQUISA)
+
+    def pesquisar(geracao, pesquisa, instante):
+        """Na thread de pesquisa: espera a pausa na digitação e busca a primeira página."""
+        # Teclas já substituídas saem da fila sem esperar
+        if geracao != geracao_pesquisa:
+            return
+        time.sleep(max(0.0, instante - time.monotonic()))
+        carregar_pagina(geracao, pesquisa, None)
+
+    def carregar_pagina(geracao, pesquisa, apos):
         """
-        Função para realizar a pesquisa em tempo real.
-        - Para CPF e matrícula, retorna apenas registros exatos.
-        - Para Nome, realiza uma busca parcial.
+        Busca uma página na thread de pesquisa. Resultados de uma pesquisa
+        já substituída por outra tecla são descartados; erros vão para o status.
         """
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-
-            # Determina a consulta com base no filtro
-            if filtro in ["cpf", "matricula"]:
-                query = f"SELECT DISTINCT nome, matricula, cpf FROM funcionarios WHERE {filtro} = ?"
-                cursor.execute(query, (valor.strip(),))  # Busca exata para CPF e matrícula
-            else:  # Busca por nome (parcial)
-                query = f"SELECT DISTINCT nome, matricula, cpf FROM funcionarios WHERE {filtro} LIKE ?"
-                cursor.execute(query, (f"%{valor.strip()}%",))  # Busca parcial para nome
-
-            resultados = cursor.fetchall()
-
-            # Atualiza a lista de funcionários
-            lista_funcionarios.controls.clear()
-
-            if resultados:
-                for nome, matricula, cpf in resultados:
-                    lista_funcionarios.controls.append(
-                        ft.Container(
-                            content=ft.Column(
-                                controls=[
-                                    ft.Text(f"Nome: {nome}", weight="bold", size=16),
-                                    ft.Text(f"Matrícula: {matricula} | CPF: {cpf}", size=14),
-                                ],
-                                spacing=5,
-                            ),
-                            padding=10,
-                            border=ft.border.all(1, ft.colors.GREY),
-                            border_radius=5,
-                            margin=ft.margin.symmetric(horizontal=5, vertical=5),
+        nonlocal pesquisa_atual, proxima_pagina
+        try:
+            if geracao != geracao_pesquisa:
+                return
+            filtro, valor = pesquisa
+            resultados, proxima = buscar_funcionarios(filtro, valor, apos=apos, db_path=db_path)
+            with lock_pesquisa:
+                if geracao != geracao_pesquisa:
+                    return
+                if apos is None:
+                    # Primeira página de uma nova pesquisa
+                    lista_funcionarios.controls.clear()
+                    pesquisa_atual = pesquisa
+                    if not resultados:
+                        lista_funcionarios.controls.append(
+                            ft.Text("Nenhum registro encontrado.", size=16, color=ft.colors.RED)
                         )
-                    )
-            else:
-                # Exibe mensagem informando que nenhum registro foi encontrado
-                lista_funcionarios.controls.append(
-                    ft.Text("Nenhum registro encontrado.", size=16, color=ft.colors.RED)
+                lista_funcionarios.controls.extend(
+                    criar_item_funcionario(nome, matricula, cpf) for nome, matricula, cpf in resultados
                 )
-
-        # Atualiza a interface para refletir as mudanças
+                proxima_pagina = proxima
+        except Exception as e:
+            print(f"[ERROR] Falha na pesquisa de funcionários: {e!r}")
+            status_text.value = f"Erro na pesquisa: {e}"
+            status_text.color = ft.Colors.RED
+        finally:
+            # Libera a rolagem mesmo quando a página foi descartada
+            if apos is not None:
+                paginacao.concluir()
         page.update()
 
+    def carregar_proxima_pagina():
+        _executor_pesquisa.submit(carregar_pagina, geracao_pesquisa, pesquisa_atual, proxima_pagina)
+
+    paginacao = PaginacaoRolagem(lista_funcionarios, lambda: proxima_pagina is not None, carregar_proxima_pagina)
+
 
     def importar_da_web(e):
-        with sqlite3.connect(db_path) as conn:
+        nonlocal geracao_pesquisa, proxima_pagina
+        with transacao(db_path) as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT entidade_id FROM entidades_configuradas LIMIT 1")
             result = cursor.fetchone()
@@ -216,30 +151,55 @@ def criar_tela_sincronizar_funcionarios(page: ft.Page, db_path: str):
             page.update()
             return
 
-        funcionarios_url = f"https://api.rh247.com.br/230440023/app/sincronizacao/funcionarios?entidade_id={entidade_id}"
-        vinculos_url = f"https://api.rh247.com.br/230440023/app/sincronizacao/funcionarios-vinculos?entidade_id={entidade_id}"
-
-        matriculas_map = {}
         loading_spinner.visible = True
-        lista_funcionarios.controls.clear()
+        with lock_pesquisa:
+            # A lista passa a mostrar os importados: descarta pesquisas e páginas pendentes
+            geracao_pesquisa += 1
+            proxima_pagina = None
+            lista_funcionarios.controls.clear()
         page.update()
 
-        sincronizar_dados_funcionarios(vinculos_url, db_path, "funcionarios_vinculos", lista_funcionarios.controls, entidade_id, matriculas_map)
-        sincronizar_dados_funcionarios(funcionarios_url, db_path, "funcionarios", lista_funcionarios.controls, entidade_id, matriculas_map)
+        def exibir_lote(gravados):
+            lista_funcionarios.controls.extend(criar_item_funcionario(*item) for item in gravados)
+            page.update()
+
+        # Só as alterações desde a última importação desta entidade
+        contagem = sincronizar_funcionarios(entidade_id, db_path, ao_lote=exibir_lote)
 
         loading_spinner.visible = False
-        if lista_funcionarios.controls:
-            status_text.value = "Funcionários e vínculos importados com sucesso."
-            status_text.color = ft.Colors.GREEN
-        else:
+        if contagem is None:
             status_text.value = "Nenhum dado importado. Verifique os logs."
             status_text.color = ft.Colors.RED
+        elif contagem["inseridos"] or contagem["atualizados"] or contagem["desativados"]:
+            status_text.value = (
+                f"Funcionários importados: {contagem['inseridos']} novos, "
+                f"{contagem['atualizados']} atualizados, {contagem['desativados']} desativados."
+            )
+            status_text.color = ft.Colors.GREEN
+        else:
+            status_text.value = "Funcionários já estavam atualizados."
+            status_text.color = ft.Colors.GREEN
+        page.update()
+
+        # Funcionários novos ou com foto nova ficam sem hash facial; calcula em segundo plano
+        iniciar_cadastro_em_segundo_plano(db_path, ao_progresso=exibir_progresso_hashes, ao_concluir=concluir_hashes)
+
+    def exibir_progresso_hashes(processados, total):
+        status_text.value = f"Calculando hashes faciais: {processados}/{total}"
+        status_text.color = ft.Colors.BLUE
+        page.update()
+
+    def concluir_hashes(processados, com_rosto):
+        if not processados:
+            return
+        status_text.value = f"Hashes faciais calculados: {com_rosto} de {processados} fotos com rosto."
+        status_text.color = ft.Colors.GREEN
         page.update()
 
     def sincronizar_local(e):
-        with sqlite3.connect(db_path) as conn:
+        with transacao(db_path) as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM funcionarios")
+            cursor.execute("SELECT funcionario_id, nome, matricula FROM funcionarios")
             funcionarios = cursor.fetchall()
 
             if not funcionarios:
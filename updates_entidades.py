@@ -1,58 +1,168 @@
+import datetime
 import sqlite3
-import requests
-import os
-
-def criar_tabelas(db_path):
-    """Cria as tabelas no banco de dados se não existirem e ajusta as tabelas existentes."""
-    tabelas = {
-        "CREATE_TABLE_ESTADOS": """
-            CREATE TABLE IF NOT EXISTS estados (
-                id INTEGER PRIMARY KEY NOT NULL, 
-                nome VARCHAR(200) NOT NULL
-            );
-        """,
-        "CREATE_TABLE_CIDADES": """
-            CREATE TABLE IF NOT EXISTS cidades (
-                id INTEGER PRIMARY KEY NOT NULL, 
-                codigo_igbe VARCHAR(200) NOT NULL,
-                nome VARCHAR(200) NOT NULL
-            );
-        """,
-        "CREATE_TABLE_ENTIDADE": """
-            CREATE TABLE IF NOT EXISTS entidades (
-                id INTEGER PRIMARY KEY NOT NULL, 
-                codigo_igbe VARCHAR(200) NOT NULL,
-                nome VARCHAR(200) NOT NULL,
-                entidade_id INTEGER NOT NULL
-            );
+import threading
+import httpx
+from configuracoes import HORAS_VALIDADE_REFERENCIA
+from criar_tabelas import criar_tabelas
+from servicos.banco_dados import DB_PATH, consultar_um, executar, fechar_conexao, transacao
+from servicos.cliente_api import obter_cliente_api
+
+_lock_atualizacao = threading.Lock()
+# UPDATE ... FROM só existe a partir do SQLite 3.33
+SQLITE_UPDATE_FROM = (3, 33, 0)
+
+
+def referencia_vencida(tabela, db_path, validade=None):
+    """True se a tabela nunca foi baixada ou a última atualização passou da validade."""
+    validade = validade or datetime.timedelta(hours=HORAS_VALIDADE_REFERENCIA)
+    linha = consultar_um(
+        "SELECT atualizado_em FROM sincronizacao_referencia WHERE tabela = ?", (tabela,), db_path=db_path
+    )
+    if linha is None:
+        return True
+    return datetime.datetime.now() - datetime.datetime.fromisoformat(linha[0]) >= validade
+
+
+def registrar_referencia(tabela, db_path, etag=None, last_modified=None, manter_validadores=False):
+    """Marca a tabela como atualizada agora (num 304, mantém ETag/Last-Modified gravados)."""
+    agora = datetime.datetime.now().isoformat(sep=" ", timespec="seconds")
+    if manter_validadores:
+        executar(
+            "UPDATE sincronizacao_referencia SET atualizado_em = ? WHERE tabela = ?",
+            (agora, tabela),
+            db_path=db_path,
+        )
+        return
+    executar(
+        """
+        INSERT OR REPLACE INTO sincronizacao_referencia (tabela, etag, last_modified, atualizado_em)
+        VALUES (?, ?, ?, ?)
         """,
-    }
+        (tabela, etag, last_modified, agora),
+        db_path=db_path,
+    )
+
+
+def _linhas_estados(dados):
+    linhas = {}
+    for estado in dados:
+        estado_id = int(estado.get("id") or 0)
+        estado_nome = estado.get("name")
+        if estado_id and estado_nome:
+            linhas[estado_id] = (estado_id, estado_nome)
+    return list(linhas.values())
+
+
+def _linhas_cidades(dados):
+    linhas = {}
+    for cidade in dados:
+        cidade_id = int(cidade.get("id") or 0)
+        cidade_nome = cidade.get("name")
+        estado_id = cidade.get("estado_id")
+        if cidade_id and cidade_nome:
+            linhas[cidade_id] = (cidade_id, cidade_id, cidade_nome, int(estado_id) if estado_id else None)
+    return list(linhas.values())
+
+
+def _linhas_entidades(dados):
+    linhas = {}
+    for entidade in dados:
+        entidade_id = entidade.get("entidade_id")
+        codigo_igbe = entidade.get("id")
+        entidade_nome = entidade.get("name")
+        if codigo_igbe and entidade_nome and entidade_id:
+            linhas[int(codigo_igbe)] = (int(codigo_igbe), codigo_igbe, entidade_nome, int(entidade_id))
+    return list(linhas.values())
 
-    try:
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            for tabela_nome, tabela_sql in tabelas.items():
-                # print(f"[INFO] Criando ou ajustando tabela: {tabela_nome}")
-                cursor.execute(tabela_sql)
-
-            # Verificar e adicionar a coluna `entidade_id` na tabela `entidades`, se necessário
-            cursor.execute("PRAGMA table_info(entidades)")
-            colunas = [info[1] for info in cursor.fetchall()]
-            if "entidade_id" not in colunas:
-                # print("[INFO] Adicionando coluna 'entidade_id' na tabela 'entidades'.")
-                cursor.execute("ALTER TABLE entidades ADD COLUMN entidade_id INTEGER NOT NULL DEFAULT 0")
-
-            conn.commit()
-    #         print("[INFO] Tabelas criadas ou ajustadas com sucesso.")
-    except sqlite3.Error as e:
-        print(f"[ERROR] Erro ao criar ou ajustar tabelas: {e}")
 
-def sincronizar_dados(api_url, tabela, db_path):
-    """Sincroniza os dados da API com a tabela do banco de dados."""
+# Colunas gravadas (a primeira é a chave) e conversão dos itens da API em linhas
+TABELAS_REFERENCIA = {
+    "estados": (("id", "nome"), _linhas_estados),
+    "cidades": (("id", "codigo_igbe", "nome", "estado_id"), _linhas_cidades),
+    "entidades": (("id", "codigo_igbe", "nome", "entidade_id"), _linhas_entidades),
+}
+
+
+def aplicar_diferencas(conn, tabela, colunas, linhas):
+    """
+    Carrega `linhas` numa tabela temporária (executemany) e aplica em
+    `tabela` só o que mudou: INSERT dos ids novos, UPDATE dos que têm
+    alguma coluna diferente e DELETE dos que não vieram. Deve rodar numa
+    transação, para os leitores nunca verem a tabela pela metade.
+    Retorna {"inseridas", "atualizadas", "removidas"}.
+    """
+    chave, demais = colunas[0], colunas[1:]
+    temporaria = f"temp_{tabela}"
+    lista_colunas = ", ".join(colunas)
+
+    # CREATE ... AS SELECT preserva a afinidade das colunas (comparação sem falsas diferenças)
+    conn.execute(f"DROP TABLE IF EXISTS temp.{temporaria}")
+    conn.execute(f"CREATE TEMP TABLE {temporaria} AS SELECT {lista_colunas} FROM {tabela} WHERE 0")
+    conn.executemany(
+        f"INSERT INTO {temporaria} ({lista_colunas}) VALUES ({', '.join('?' for _ in colunas)})",
+        linhas,
+    )
+    conn.execute(f"CREATE UNIQUE INDEX temp.idx_{temporaria}_{chave} ON {temporaria} ({chave})")
+
+    removidas = conn.execute(
+        f"DELETE FROM {tabela} WHERE {chave} NOT IN (SELECT {chave} FROM {temporaria})"
+    ).rowcount
+    diferente = " OR ".join(f"{tabela}.{c} IS NOT novo.{c}" for c in demais)
+    if sqlite3.sqlite_version_info >= SQLITE_UPDATE_FROM:
+        sql_update = f"""
+            UPDATE {tabela} SET {', '.join(f'{c} = novo.{c}' for c in demais)}
+            FROM {temporaria} AS novo
+            WHERE {tabela}.{chave} = novo.{chave} AND ({diferente})
+        """
+    else:
+        # Mesmo efeito com subconsultas correlacionadas (pelo índice da temporária)
+        sql_update = f"""
+            UPDATE {tabela} SET ({', '.join(demais)}) = (
+                SELECT {', '.join(f'novo.{c}' for c in demais)} FROM {temporaria} AS novo
+                WHERE novo.{chave} = {tabela}.{chave}
+            )
+            WHERE EXISTS (
+                SELECT 1 FROM {temporaria} AS novo
+                WHERE novo.{chave} = {tabela}.{chave} AND ({diferente})
+            )
+        """
+    atualizadas = conn.execute(sql_update).rowcount
+    inseridas = conn.execute(
+        f"""
+        INSERT INTO {tabela} ({lista_colunas})
+        SELECT {lista_colunas} FROM {temporaria}
+        WHERE {chave} NOT IN (SELECT {chave} FROM {tabela})
+        """
+    ).rowcount
+
+    conn.execute(f"DROP TABLE temp.{temporaria}")
+    return {"inseridas": inseridas, "atualizadas": atualizadas, "removidas": removidas}
+
+
+def cabecalhos_condicionais(tabela, db_path):
+    """If-None-Match/If-Modified-Since com os validadores da última resposta da tabela."""
+    validadores = consultar_um(
+        "SELECT etag, last_modified FROM sincronizacao_referencia WHERE tabela = ?", (tabela,), db_path=db_path
+    )
+    cabecalhos = {}
+    if validadores and validadores[0]:
+        cabecalhos["If-None-Match"] = validadores[0]
+    if validadores and validadores[1]:
+        cabecalhos["If-Modified-Since"] = validadores[1]
+    return cabecalhos
+
+
+def aplicar_resposta(tabela, response, db_path):
+    """
+    Aplica na tabela a resposta da API. Se o servidor respondeu 304 (dados
+    iguais aos da última vez), só o horário da verificação é atualizado.
+    Retorna as contagens de aplicar_diferencas, ou None se nada foi aplicado.
+    """
+    api_url = response.request.url
     try:
-        # Obter os dados da API
-        # print(f"[INFO] Sincronizando dados da API: {api_url}")
-        response = requests.get(api_url, timeout=10)
+        if response.status_code == 304:
+            registrar_referencia(tabela, db_path, manter_validadores=True)
+            return None
         response.raise_for_status()
         dados = response.json()
 
@@ -63,71 +173,89 @@ def sincronizar_dados(api_url, tabela, db_path):
         if not isinstance(dados, list):
             raise ValueError(f"Os dados da API {api_url} não estão no formato esperado.")
 
-        # print(f"[INFO] Recebidos {len(dados)} registros para a tabela '{tabela}'.")
-
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-
-            if tabela == "estados":
-                cursor.execute("DELETE FROM estados")
-                for estado in dados:
-                    estado_id = int(estado.get("id"))
-                    estado_nome = estado.get("name")
-                    if estado_id and estado_nome:
-                        cursor.execute("INSERT INTO estados (id, nome) VALUES (?, ?)", (estado_id, estado_nome))
-
-            elif tabela == "cidades":
-                cursor.execute("DELETE FROM cidades")
-                for cidade in dados:
-                    cidade_id = int(cidade.get("id"))
-                    cidade_nome = cidade.get("name")
-                    if cidade_id and cidade_nome:
-                        cursor.execute(
-                            "INSERT INTO cidades (id, codigo_igbe, nome) VALUES (?, ?, ?)",
-                            (cidade_id, cidade_id, cidade_nome),
-                        )
-
-            elif tabela == "entidades":
-                cursor.execute("DELETE FROM entidades")
-                for entidade in dados:
-                    entidade_id = entidade.get("entidade_id")
-                    codigo_igbe = entidade.get("id")
-                    entidade_nome = entidade.get("name")
-
-                    if codigo_igbe and entidade_nome and entidade_id:
-                        cursor.execute(
-                            "INSERT INTO entidades (id, codigo_igbe, nome, entidade_id) VALUES (?, ?, ?, ?)",
-                            (int(codigo_igbe), codigo_igbe, entidade_nome, int(entidade_id)),
-                        )
-
-            conn.commit()
-
-        # print(f"[INFO] Dados da tabela '{tabela}' sincronizados com sucesso.")
-
-    except requests.RequestException as e:
+        colunas, converter = TABELAS_REFERENCIA[tabela]
+        linhas = converter(dados)
+        if not linhas:
+            # Resposta vazia não apaga a cópia local
+            print(f"[AVISO] API {api_url} não retornou registros para '{tabela}'.")
+            return None
+
+        with transacao(db_path) as conn:
+            contagem = aplicar_diferencas(conn, tabela, colunas, linhas)
+        print(
+            f"[INFO] {tabela}: {contagem['inseridas']} inseridas, "
+            f"{contagem['atualizadas']} atualizadas, {contagem['removidas']} removidas."
+        )
+
+        registrar_referencia(
+            tabela, db_path, response.headers.get("ETag"), response.headers.get("Last-Modified")
+        )
+        return contagem
+
+    except httpx.HTTPStatusError as e:
         print(f"[ERROR] Erro ao acessar a API {api_url}: {e}")
     except sqlite3.Error as e:
         print(f"[ERROR] Erro ao atualizar a tabela {tabela}: {e}")
     except ValueError as e:
+        # json inválido também é ValueError
         print(f"[ERROR] Erro de formatação na resposta da API {api_url}: {e}")
+    return None
+
+# Endpoint (relativo a configuracoes.API_URL_BASE) de cada tabela
+ENDPOINTS_REFERENCIA = {
+    "estados": "estados",
+    "cidades": "municipios",
+    "entidades": "entidades",
+}
+
+def atualizar_entidades(db_path, forcar=False, cliente=None):
+    """
+    Atualiza as tabelas de estados, cidades e entidades que estiverem
+    vencidas. As requisições saem em paralelo (o tempo total é o da mais
+    lenta); as respostas são aplicadas uma a uma no banco.
+    Retorna {tabela: contagens} das tabelas alteradas.
+    """
+    vencidas = [t for t in ENDPOINTS_REFERENCIA if forcar or referencia_vencida(t, db_path)]
+    if not vencidas:
+        return {}
+
+    cliente = cliente or obter_cliente_api()
+    respostas = cliente.buscar_varios({
+        tabela: (ENDPOINTS_REFERENCIA[tabela], None, cabecalhos_condicionais(tabela, db_path))
+        for tabela in vencidas
+    })
 
-def atualizar_entidades(db_path):
-    """Atualiza as tabelas de estados, cidades e entidades."""
-    if not os.path.exists(db_path):
-        # print(f"[INFO] Banco de dados não encontrado. Criando novo banco: {db_path}")
-        open(db_path, 'w').close()  # Cria o arquivo do banco de dados vazio
+    alteracoes = {}
+    for tabela, response in respostas.items():
+        # buscar_varios devolve a exceção de cada requisição que falhou, de qualquer tipo
+        if isinstance(response, BaseException):
+            print(f"[ERROR] Erro ao acessar a API de {tabela}: {response!r}")
+            continue
+        contagem = aplicar_resposta(tabela, response, db_path)
+        if contagem is not None:
+            alteracoes[tabela] = contagem
+    return alteracoes
 
-    criar_tabelas(db_path)
+def atualizar_entidades_em_segundo_plano(db_path):
+    """
+    Roda atualizar_entidades numa thread daemon, para a rede (ou a falta
+    dela) não atrasar a abertura do app. Ignorado se já estiver rodando.
+    """
+    if not _lock_atualizacao.acquire(blocking=False):
+        return False
 
-    apis = {
-        "estados": "https://api.rh247.com.br/230440023/app/sincronizacao/estados",
-        "cidades": "https://api.rh247.com.br/230440023/app/sincronizacao/municipios",
-        "entidades": "https://api.rh247.com.br/230440023/app/sincronizacao/entidades",
-    }
+    def executar_atualizacao():
+        try:
+            atualizar_entidades(db_path)
+        except Exception as e:
+            print(f"[ERROR] Falha ao atualizar estados, cidades e entidades: {e}")
+        finally:
+            fechar_conexao(db_path)
+            _lock_atualizacao.release()
 
-    for tabela, api_url in apis.items():
-        sincronizar_dados(api_url, tabela, db_path)
+    threading.Thread(target=executar_atualizacao, daemon=True).start()
+    return True
 
 if __name__ == "__main__":
-    DB_PATH = "banco_de_dados.db"
-    atualizar_entidades(DB_PATH)
+    criar_tabelas(DB_PATH)
+    atualizar_entidades(DB_PATH, forcar=True)